@@ -7,6 +7,7 @@ Provides CV-job matching scores and explanations using GPT models.
 """
 
 import argparse
+import concurrent.futures
 import json
 import os
 import sys
@@ -305,18 +306,23 @@ Job Description:
         
         return False, None
 
-    def analyze_jobs_batch(self, count=None):
+    def analyze_jobs_batch(self, count=None, message_ids=None, workers=8):
         """
         Analyze a batch of jobs that need LLM processing
         
         Args:
             count: Number of jobs to process (None = process all available jobs)
+            message_ids: Only consider these Message-IDs (None = any job needing analysis)
+            workers: Number of OpenAI requests to run concurrently
             
         Returns:
             Dict with processing statistics
         """
         # Get jobs that need processing
         jobs_needing_llm = query_jobs.get_jobs_needing_llm_processing()
+        if message_ids is not None:
+            wanted = set(message_ids)
+            jobs_needing_llm = [(k, v) for k, v in jobs_needing_llm if k in wanted]
         
         if not jobs_needing_llm:
             print("No jobs need LLM processing.")
@@ -333,12 +339,11 @@ Job Description:
             print(f"Found {len(jobs_needing_llm)} jobs needing analysis, processing {len(jobs_to_process)}")
         
         stats = {'processed': 0, 'errors': 0, 'skipped': 0}
+        jobs_to_analyze = []
         
-        for i, (message_id, email_data) in enumerate(jobs_to_process, 1):
-            print(f"\\n[{i}/{len(jobs_to_process)}] Processing job...")
-            
+        # Pre-filter first; that is local and cheap
+        for message_id, email_data in jobs_to_process:
             try:
-                # Pre-filter check
                 parsed = email_data.get('parsed', {})
                 job_title = parsed.get('job_title', '')
                 job_description = parsed.get('description', '')
@@ -365,15 +370,7 @@ Job Description:
                         print(f"  ✗ Failed to save skip result")
                     continue
                 
-                # Analyze the job
-                analysis_results = self.analyze_job(message_id, email_data)
-                
-                # Save results
-                if self.save_analysis_result(message_id, analysis_results):
-                    stats['processed'] += 1
-                else:
-                    stats['errors'] += 1
-                    print(f"  ✗ Failed to save results")
+                jobs_to_analyze.append((message_id, email_data))
                     
             except Exception as e:
                 print(f"  ✗ Error processing job: {e}")
@@ -381,6 +378,32 @@ Job Description:
                 traceback.print_exc()
                 stats['errors'] += 1
         
+        # The OpenAI calls are network-bound and independent, so run them
+        # in worker threads; results are saved here, one at a time
+        with concurrent.futures.ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+            futures = [executor.submit(self.analyze_job, message_id, email_data)
+                       for message_id, email_data in jobs_to_analyze]
+            
+            for i, ((message_id, email_data), future) in enumerate(zip(jobs_to_analyze, futures), 1):
+                print(f"\\n[{i}/{len(jobs_to_analyze)}] Processing job...")
+                
+                try:
+                    # analyze_job reports its own failures in the result
+                    analysis_results = future.result()
+                    
+                    # Save results
+                    if self.save_analysis_result(message_id, analysis_results):
+                        stats['processed'] += 1
+                    else:
+                        stats['errors'] += 1
+                        print(f"  ✗ Failed to save results")
+                        
+                except Exception as e:
+                    print(f"  ✗ Error processing job: {e}")
+                    print("Full traceback:")
+                    traceback.print_exc()
+                    stats['errors'] += 1
+        
         print(f"\\n=== Batch Analysis Complete ===")
         print(f"Processed: {stats['processed']}")
         print(f"Errors: {stats['errors']}")
@@ -391,8 +414,14 @@ Job Description:
         return stats
 
 
-def main():
-    """Main function with command line interface"""
+def main(argv=None, message_ids=None):
+    """Main function with command line interface
+
+    Args:
+        argv: Argument list to parse (None = sys.argv[1:])
+        message_ids: Restrict analysis to these Message-IDs, for callers
+                     that have just stored new jobs
+    """
     parser = argparse.ArgumentParser(description="Analyze jobs using OpenAI API")
     parser.add_argument('--count', '-c', type=int, default=None,
                         help='Number of jobs to process (default: all available jobs)')
@@ -402,8 +431,10 @@ def main():
                         help='Path to environment data file (default: ~/.env_data)')
     parser.add_argument('--list-jobs', '-l', action='store_true',
                         help='List jobs that need processing and exit')
+    parser.add_argument('--workers', '-w', type=int, default=8,
+                        help='Concurrent OpenAI requests (default: 8)')
     
-    args = parser.parse_args()
+    args = parser.parse_args(argv)
     
     # Verify CV file exists
     cv_path = os.path.expanduser(args.cv_file)
@@ -429,7 +460,7 @@ def main():
     # Create analyzer and process jobs
     try:
         analyzer = OpenAIJobAnalyzer(args.env_data, args.cv_file)
-        stats = analyzer.analyze_jobs_batch(args.count)
+        stats = analyzer.analyze_jobs_batch(args.count, message_ids=message_ids, workers=args.workers)
         
         print(f"\\nAnalysis complete!")
         return 0 if stats['errors'] == 0 else 1
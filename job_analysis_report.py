@@ -9,6 +9,7 @@ generates an HTML report, and deploys it via WebDAV.
 import os
 import io
 import datetime
+import json
 import numpy as np
 import requests
 import netrc
@@ -78,24 +79,8 @@ def sort_jobs(gd):
     return keys
 
 
-def generate_html_table(gd, keys, min_score=5):
-    """Generate HTML table with job listings and toggleable details."""
-    now = datetime.datetime.now(datetime.UTC)
-    
-    rec_to_row = [
-        ('Score', lambda r: str(r.get('score', ''))),
-        ('Reference', lambda r: str(r['parsed_job'].get('ref', '-')) if 'parsed_job' in r else '-'),
-        ('Job Title', lambda r: r['parsed_job']['job_title'] if 'parsed_job' in r and 'job_title' in r['parsed_job'] else '-'),
-        ('Company', lambda r: r['parsed_job']['employment_business'] if 'parsed_job' in r and 'employment_business' in r['parsed_job'] else '-'),
-        ('age', lambda r: rec_format_tdelta(r, now)),
-        ('Location', lambda r: r['parsed_job']['location'] if 'parsed_job' in r and 'location' in r['parsed_job'] else '-'),
-        ('Salary', lambda r: r['parsed_job']['salary'] if 'parsed_job' in r and 'salary' in r['parsed_job'] else '-'),
-        ('Work Type', lambda r: r['parsed_job']['work_type'] if 'parsed_job' in r and 'work_type' in r['parsed_job'] else '-'),
-        ('Posted', format_posted_date),
-        ('Link', lambda r: '<a href="' + r['parsed_job']['job_url'] + '"> Job</a>' if 'parsed_job' in r and 'job_url' in r['parsed_job'] else '-')
-    ]
-    
-    html_table = '''
+# Static parts of the job table, built once rather than per report
+_TABLE_HEAD = '''
 <style>
     table { border-collapse: collapse; width: 100%; }
     th, td { border: 1px solid #ddd; padding: 8px; text-align: left; }
@@ -219,15 +204,73 @@ def generate_html_table(gd, keys, min_score=5):
     }
 </style>
 <table><thead><tr>'''
+
+# Shows a job's reason overlay when its row is the URL target
+_OVERLAY_SCRIPT = '''
+<script>
+// Show reason overlay when job row is in URL hash
+function checkHash() {
+    var hash = window.location.hash;
+    if (hash.startsWith('#job-')) {
+        // Hide all overlays
+        document.querySelectorAll('.reason-overlay').forEach(function(overlay) {
+            overlay.style.display = 'none';
+        });
+        
+        // Show corresponding overlay
+        var jobNum = hash.replace('#job-', '');
+        var overlay = document.getElementById('reason-' + jobNum);
+        if (overlay) {
+            overlay.style.display = 'block';
+        }
+    }
+}
+
+// Check on page load and hash change
+window.addEventListener('load', checkHash);
+window.addEventListener('hashchange', checkHash);
+
+// Close overlay functionality
+document.addEventListener('click', function(e) {
+    if (e.target.classList.contains('close-overlay')) {
+        e.preventDefault();
+        document.querySelectorAll('.reason-overlay').forEach(function(overlay) {
+            overlay.style.display = 'none';
+        });
+        // Remove hash to prevent issues
+        history.replaceState(null, null, window.location.pathname);
+    }
+});
+</script>'''
+
+
+def generate_html_table(gd, keys, min_score=5):
+    """Generate HTML table with job listings and toggleable details."""
+    now = datetime.datetime.now(datetime.UTC)
+    
+    rec_to_row = [
+        ('Score', lambda r: str(r.get('score', ''))),
+        ('Reference', lambda r: str(r['parsed_job'].get('ref', '-')) if 'parsed_job' in r else '-'),
+        ('Job Title', lambda r: r['parsed_job']['job_title'] if 'parsed_job' in r and 'job_title' in r['parsed_job'] else '-'),
+        ('Company', lambda r: r['parsed_job']['employment_business'] if 'parsed_job' in r and 'employment_business' in r['parsed_job'] else '-'),
+        ('age', lambda r: rec_format_tdelta(r, now)),
+        ('Location', lambda r: r['parsed_job']['location'] if 'parsed_job' in r and 'location' in r['parsed_job'] else '-'),
+        ('Salary', lambda r: r['parsed_job']['salary'] if 'parsed_job' in r and 'salary' in r['parsed_job'] else '-'),
+        ('Work Type', lambda r: r['parsed_job']['work_type'] if 'parsed_job' in r and 'work_type' in r['parsed_job'] else '-'),
+        ('Posted', format_posted_date),
+        ('Link', lambda r: '<a href="' + r['parsed_job']['job_url'] + '"> Job</a>' if 'parsed_job' in r and 'job_url' in r['parsed_job'] else '-')
+    ]
+    
+    html_parts = [_TABLE_HEAD]
     
     for k in rec_to_row:
         if k[0] != 'Link':
-            html_table += f'<th>{k[0]}</th>\n'
+            html_parts.append(f'<th>{k[0]}</th>\n')
     for k in rec_to_row:
         if k[0] == 'Link':
-            html_table += f'<th>{k[0]}</th>\n'
+            html_parts.append(f'<th>{k[0]}</th>\n')
     
-    html_table += '</tr></thead>\n<tbody>'
+    html_parts.append('</tr></thead>\n<tbody>')
     
     # Score to color mapping (10=purple, 9=blue, 8=green, 7=yellow, 6=orange, 5=red)
     score_colors = {
@@ -249,22 +292,20 @@ def generate_html_table(gd, keys, min_score=5):
         score = rec.get('score', 0)
         bg_color = score_colors.get(score, '#ffffff')  # Default to white
 
-        html_table += f'<tr class="job_row job-anchor" id="job-{idx}" data-row="{idx}" style="background-color: {bg_color};">'
+        html_parts.append(f'<tr class="job_row job-anchor" id="job-{idx}" data-row="{idx}" style="background-color: {bg_color};">')
         for col_idx, (k, t) in enumerate(rec_to_row):
             value = t(rec) if callable(t) else t
             if k == 'Score':
                 # Create link that scrolls to job row and shows floating overlay
-                html_table += f'<td class="job_score_col"><a href="#job-{idx}">{value}</a></td>'
+                html_parts.append(f'<td class="job_score_col"><a href="#job-{idx}">{value}</a></td>')
             elif k == 'Link':
-                html_table += f'<td class="job_link_col">{value}</td>'
+                html_parts.append(f'<td class="job_link_col">{value}</td>')
             else:
-                html_table += f'<td>{value}</td>'
-        html_table += '</tr>\n'
+                html_parts.append(f'<td>{value}</td>')
+        html_parts.append('</tr>\n')
 
         # Show only the 'reason' field from structured LLM output if present
         analysis = rec.get("scored_job", "")
-        from html import escape
-        import json
         reason_text = None
         if analysis.strip():
             try:
@@ -277,54 +318,19 @@ def generate_html_table(gd, keys, min_score=5):
         analysis_html = markdown.markdown(reason_text if reason_text else analysis)
 
         # Create floating overlay that appears when job row is targeted
-        html_table += f'''
+        html_parts.append(f'''
         <div class="reason-overlay" id="reason-{idx}">
             <a href="#" class="close-overlay">&times;</a>
             <div style="margin-top: 20px;">{analysis_html}</div>
         </div>
-        '''
+        ''')
     
-    html_table += '</tbody></table>'
+    html_parts.append('</tbody></table>')
     
     # Add JavaScript to show overlay when job row is targeted
-    html_table += '''
-<script>
-// Show reason overlay when job row is in URL hash
-function checkHash() {
-    var hash = window.location.hash;
-    if (hash.startsWith('#job-')) {
-        // Hide all overlays
-        document.querySelectorAll('.reason-overlay').forEach(function(overlay) {
-            overlay.style.display = 'none';
-        });
-        
-        // Show corresponding overlay
-        var jobNum = hash.replace('#job-', '');
-        var overlay = document.getElementById('reason-' + jobNum);
-        if (overlay) {
-            overlay.style.display = 'block';
-        }
-    }
-}
-
-// Check on page load and hash change
-window.addEventListener('load', checkHash);
-window.addEventListener('hashchange', checkHash);
-
-// Close overlay functionality
-document.addEventListener('click', function(e) {
-    if (e.target.classList.contains('close-overlay')) {
-        e.preventDefault();
-        document.querySelectorAll('.reason-overlay').forEach(function(overlay) {
-            overlay.style.display = 'none';
-        });
-        // Remove hash to prevent issues
-        history.replaceState(null, null, window.location.pathname);
-    }
-});
-</script>'''
+    html_parts.append(_OVERLAY_SCRIPT)
     
-    return html_table
+    return ''.join(html_parts)
 
 
 def generate_unclassified_table(gd):
@@ -343,7 +349,7 @@ def generate_unclassified_table(gd):
         key=lambda k: datetime.datetime.fromisoformat(unclassified[k].get('date', '2000-01-01'))
     )
     
-    html_table = '''
+    html_parts = ['''
 <h2>Unclassified Emails</h2>
 <table border="1">
 <thead><tr>
@@ -351,16 +357,16 @@ def generate_unclassified_table(gd):
     <th>Subject</th>
 </tr></thead>
 <tbody>
-'''
+''']
     
     for key in sorted_keys:
         rec = unclassified[key]
         date_str = datetime.datetime.fromisoformat(rec.get('date', '2000-01-01')).strftime('%Y-%m-%d %H:%M:%S')
         subject = rec.get('subject', 'No Subject')
-        html_table += f'<tr><td>{date_str}</td><td>{subject}</td></tr>\n'
+        html_parts.append(f'<tr><td>{date_str}</td><td>{subject}</td></tr>\n')
     
-    html_table += '</tbody></table>\n'
-    return html_table
+    html_parts.append('</tbody></table>\n')
+    return ''.join(html_parts)
 
 
 def generate_applications_table(gd):
@@ -388,7 +394,7 @@ def generate_applications_table(gd):
         key=lambda k: datetime.datetime.fromisoformat(applications[k].get('date', '2000-01-01'))
     )
     
-    html_table = '''
+    html_parts = ['''
 <h2>Job Applications</h2>
 <table border="1">
 <thead><tr>
@@ -396,16 +402,16 @@ def generate_applications_table(gd):
     <th>Subject</th>
 </tr></thead>
 <tbody>
-'''
+''']
     
     for key in sorted_keys:
         rec = applications[key]
         date_str = datetime.datetime.fromisoformat(rec.get('date', '2000-01-01')).strftime('%Y-%m-%d %H:%M:%S')
         subject = rec.get('subject', 'No Subject')
-        html_table += f'<tr><td>{date_str}</td><td>{subject}</td></tr>\n'
+        html_parts.append(f'<tr><td>{date_str}</td><td>{subject}</td></tr>\n')
     
-    html_table += '</tbody></table>\n'
-    return html_table
+    html_parts.append('</tbody></table>\n')
+    return ''.join(html_parts)
 
 
 def create_full_html_document(table_html, applications_html='', unclassified_html=''):
@@ -18,28 +18,42 @@ import csv
 import io
 import datetime
 import argparse
+import functools
+import importlib.util
 import gdata
 from gdata import GDataLockedError
 
-# FastAPI imports (optional)
-try:
-    from fastapi import FastAPI, Header
-    from fastapi.responses import Response, JSONResponse
-    HAS_FASTAPI = True
-except ImportError:
-    HAS_FASTAPI = False
+# FastAPI is optional and only imported when `app` is first accessed, so
+# CLI and WSGI use don't pay for loading it (see create_app/__getattr__).
+HAS_FASTAPI = importlib.util.find_spec('fastapi') is not None
 
 
-def get_config_from_env():
-    """Get configuration from environment variables (for WSGI)."""
+@functools.lru_cache(maxsize=1)
+def _parse_config(db_path, days, min_score, refresh_timeout):
+    """Build the config dict from raw environment strings (cached)."""
     return {
-        'db_path': os.environ.get('JOBSERVE_DBFILE', '~/.jobserve.gdbm'),
-        'days': int(os.environ.get('JOBSERVE_DAYS', '7')),
-        'min_score': int(os.environ.get('JOBSERVE_MIN_SCORE', '5')),
-        'refresh_timeout': int(os.environ.get('JOBSERVE_REFRESH_TIMEOUT', '10')),
+        'db_path': db_path,
+        'days': int(days),
+        'min_score': int(min_score),
+        'refresh_timeout': int(refresh_timeout),
     }
 
 
+def get_config_from_env():
+    """Get configuration from environment variables (for WSGI).
+
+    Parsing is cached on the raw values, so repeated requests only pay for
+    the environment lookups. A fresh dict is returned each call because
+    request handlers override 'days'/'min_score' in place.
+    """
+    return dict(_parse_config(
+        os.environ.get('JOBSERVE_DBFILE', '~/.jobserve.gdbm'),
+        os.environ.get('JOBSERVE_DAYS', '7'),
+        os.environ.get('JOBSERVE_MIN_SCORE', '5'),
+        os.environ.get('JOBSERVE_REFRESH_TIMEOUT', '10'),
+    ))
+
+
 def load_jobs(db_path, days=7):
     """Load jobs from the last N days from GDBM database (read-only)."""
     now = datetime.datetime.now(datetime.UTC)
@@ -391,13 +405,14 @@ def application(environ, start_response):
             config['db_path'], config['days'], config['min_score'], accept_header
         )
         
+        body = output.encode('utf-8')
         status = '200 OK'
         response_headers = [
             ('Content-Type', content_type),
-            ('Content-Length', str(len(output))),
+            ('Content-Length', str(len(body))),
         ]
         start_response(status, response_headers)
-        return [output.encode('utf-8')]
+        return [body]
         
     except BlockingIOError:
         # Database is locked
@@ -412,28 +427,29 @@ def application(environ, start_response):
             content_type_str, timeout, current_url
         )
         
+        body = error_body.encode('utf-8')
         status = '503 Service Unavailable'
         response_headers = [
             ('Content-Type', content_type),
-            ('Content-Length', str(len(error_body))),
+            ('Content-Length', str(len(body))),
             ('Refresh', hdrs['Refresh']),
             ('Retry-After', hdrs['Retry-After']),
         ]
         start_response(status, response_headers)
-        return [error_body.encode('utf-8')]
+        return [body]
         
     except Exception as e:
         # General error
         error_msg = str(e)
-        error_body = json.dumps({'status': 'error', 'error': error_msg}, indent=2)
+        body = json.dumps({'status': 'error', 'error': error_msg}, indent=2).encode('utf-8')
         
         status = '500 Internal Server Error'
         response_headers = [
             ('Content-Type', 'application/json; charset=utf-8'),
-            ('Content-Length', str(len(error_body))),
+            ('Content-Length', str(len(body))),
         ]
         start_response(status, response_headers)
-        return [error_body.encode('utf-8')]
+        return [body]
 
 
 
@@ -441,7 +457,11 @@ def application(environ, start_response):
 # FastAPI Entry Point
 # ============================================================================
 
-if HAS_FASTAPI:
+def create_app():
+    """Build the FastAPI application (imports FastAPI on first use)."""
+    from fastapi import FastAPI, Header
+    from fastapi.responses import Response, JSONResponse
+
     app = FastAPI(title='Job Analysis API', description='Extract job data in multiple formats')
     # Allow all Host headers (useful when serving via dynamic DNS or external testing).
     # Starlette's TrustedHostMiddleware normally restricts Host header values; explicitly
@@ -525,5 +545,17 @@ if HAS_FASTAPI:
         """Health check endpoint."""
         return {'status': 'ok', 'api': 'job_api'}
 
+    return app
+
+
+def __getattr__(name):
+    """Create the FastAPI app lazily on first access to job_api.app."""
+    global app
+    if name == 'app' and HAS_FASTAPI:
+        app = create_app()
+        return app
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
 if __name__ == '__main__':
     sys.exit(main_cli())
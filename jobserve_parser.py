@@ -2,45 +2,197 @@
 # This is a compatibility shim to allow legacy imports to work.
 # It simply re-exports everything from newparser_jobserve.py
 from newparser_jobserve import *
-
-# Configuration: How often to check for old dates (1 in N chance)
+import base64
+import collections
+import concurrent.futures
+import dataclasses
+import functools
+import hashlib
+from typing import Optional
+
+try:
+    import orjson  # optional; C encoder for the parsed/ JSON files
+except ImportError:
+    orjson = None
+
+# Configuration: How often cleanup rescans the whole db for date sets (every Nth run)
 OLD_DATE_CLEANUP_FREQUENCY = 5  # Change this to run cleanup less/more often
 
+# Headers never copied into the stored record (X-* are skipped as well)
+_SKIP_HEADERS = frozenset(('DKIM-Signature', 'Received'))
+
 # Database configuration
 DATABASE_FILENAME = '.js_new.gdbm'  # Using the migrated database
 
 
+# Job URL patterns (\s stops a bare link at any Unicode space, e.g. &nbsp;)
+_SAFELINK_RE = re.compile(r'https://[^"]*\.safelinks\.protection\.outlook\.com/[^"]*')
+_ORIGINALSRC_RE = re.compile(r'originalsrc=["\'](https://www\.jobserve\.com/jslinka\.aspx\?[^"\']*)["\']')
+_JSLINKA_RE = re.compile(r'https://www\.jobserve\.com/jslinka\.aspx\?[^"\s]*')
+# Same patterns over the raw payload bytes (ASCII-compatible charsets);
+# bytes \s is ASCII only, so _JSLINKA_RE_B matches are trimmed by _JSLINKA_RE
+_SAFELINK_RE_B = re.compile(_SAFELINK_RE.pattern.encode('ascii'))
+_ORIGINALSRC_RE_B = re.compile(_ORIGINALSRC_RE.pattern.encode('ascii'))
+_JSLINKA_RE_B = re.compile(_JSLINKA_RE.pattern.encode('ascii'))
+
+# Path separators in filename parts become '_'
+_PATH_SEP_TRANS = str.maketrans({os.sep: '_'})
+# Message-ID -> bare id as it appears in saved filenames
+_CLEAN_MSGID_TRANS = str.maketrans({'<': None, '>': None, os.sep: '_'})
+
+# Saved HTML filename: '<subject>.<message-id>.<uidl>.html'
+_HTML_NAME_RE = re.compile(r'<([^<>]*)>\.\d+\.html$')
+
+
+@dataclasses.dataclass(slots=True)
+class EmailRecord:
+    """One JobServe email as stored in gdata under its Message-ID"""
+    headers: dict
+    uidl: Optional[int] = None
+    jobserve_ref: Optional[str] = None  # JobServe ref as metadata
+    job_type: Optional[str] = None      # 'suggestion' or 'alert'
+    job_url: Optional[str] = None
+    parsed: Optional[dict] = None
+
+    @classmethod
+    def from_db(cls, data):
+        return cls(headers=data.get('headers', {}),
+                   uidl=data.get('UIDL'),
+                   jobserve_ref=data.get('jobserve_ref'),
+                   job_type=data.get('job_type'),
+                   job_url=data.get('job_url'),
+                   parsed=data.get('parsed'))
+
+    def to_db(self):
+        """Dict in the stored layout ('UIDL' key, unset job_url/parsed omitted)"""
+        # Built by hand: dataclasses.asdict would deep-copy headers and parsed
+        data = {
+            'headers': self.headers,
+            'jobserve_ref': self.jobserve_ref,
+            'job_type': self.job_type,
+            'job_url': self.job_url,
+            'parsed': self.parsed,
+            'UIDL': self.uidl,
+        }
+        for key in ('job_url', 'parsed'):
+            if not data[key]:
+                del data[key]
+        return data
+
+
 def extract_job_url_from_html(html_content):
     """Extract the actual job URL from JobServe email HTML content"""
     if not html_content:
         return None
         
+    # Each regex is gated on a literal substring probe; 'in' is a fast
+    # memchr-style scan, so emails lacking a link type skip its regex
+    
     # Look for Outlook safelinks first (they're also valid and work)
-    safelink_pattern = r'https://[^"]*\.safelinks\.protection\.outlook\.com/[^"]*'
-    safelink_match = re.search(safelink_pattern, html_content)
-    if safelink_match:
-        return safelink_match.group()
+    if 'safelinks.protection.outlook.com' in html_content:
+        safelink_match = _SAFELINK_RE.search(html_content)
+        if safelink_match:
+            return safelink_match.group()
+    
+    if 'jslinka.aspx' not in html_content:
+        return None
     
     # Look for the Apply button link with originalsrc attribute
     # Pattern: originalsrc="https://www.jobserve.com/jslinka.aspx?..."
-    pattern = r'originalsrc=["\']https://www\.jobserve\.com/jslinka\.aspx\?[^"\']*["\']'
-    match = re.search(pattern, html_content)
-    
-    if match:
-        # Extract the URL from the originalsrc attribute
-        url_match = re.search(r'originalsrc=["\']([^"\']*)["\']', match.group())
-        if url_match:
-            return url_match.group(1)
+    # (the URL itself is captured, no second search over the match needed)
+    if 'originalsrc=' in html_content:
+        match = _ORIGINALSRC_RE.search(html_content)
+        if match:
+            return match.group(1)
     
     # Fallback: look for any jobserve.com/jslinka.aspx link
-    pattern2 = r'https://www\.jobserve\.com/jslinka\.aspx\?[^"\s]*'
-    match2 = re.search(pattern2, html_content)
+    match2 = _JSLINKA_RE.search(html_content)
     if match2:
         return match2.group()
     
     return None
 
 
+def extract_job_url_from_html_bytes(payload, charset='utf-8'):
+    """
+    extract_job_url_from_html over the undecoded HTML payload, for
+    ASCII-compatible charsets; saves decoding the body just to find the URL.
+    """
+    if not payload:
+        return None
+    
+    url = None
+    if b'safelinks.protection.outlook.com' in payload:
+        match = _SAFELINK_RE_B.search(payload)
+        if match:
+            url = match.group()
+    if url is None and b'jslinka.aspx' in payload:
+        match = None
+        if b'originalsrc=' in payload:
+            match = _ORIGINALSRC_RE_B.search(payload)
+            if match:
+                url = match.group(1)
+        if url is None:
+            match = _JSLINKA_RE_B.search(payload)
+            if match:
+                # Cut at the first Unicode space, as the str search would
+                decoded = match.group().decode(charset, errors='replace')
+                return _JSLINKA_RE.match(decoded).group()
+    
+    return url.decode(charset, errors='replace') if url is not None else None
+
+
+def build_html_index(html_dir='html'):
+    """
+    Index the saved HTML files for find_html_file: returns (index, loose).
+    
+    Files are named '<subject>.<message-id>.<uidl>.html'; index maps the
+    clean Message-ID (no angle brackets), the last bracketed segment before
+    the UIDL, to the path. Names from a Message-ID without brackets can't
+    be split from the subject, so they go to loose as (name, path).
+    """
+    index = {}
+    loose = []
+    try:
+        with os.scandir(html_dir) as entries:
+            for entry in entries:
+                if not entry.name.endswith('.html') or not entry.is_file():
+                    continue
+                m = _HTML_NAME_RE.search(entry.name)
+                if m:
+                    index[m.group(1)] = entry.path
+                else:
+                    loose.append((entry.name, entry.path))
+    except FileNotFoundError:
+        print(f"HTML directory not found: {html_dir}")
+    return index, loose
+
+
+def find_html_file(html_index, clean_msg_id):
+    """Path of the saved HTML for clean_msg_id from build_html_index, or None"""
+    index, loose = html_index
+    path = index.get(clean_msg_id)
+    if path is None:
+        # Bracketless names: substring match, as a directory scan would
+        path = next((p for name, p in loose if clean_msg_id in name), None)
+    return path
+
+
+def _read_job_url(html_path):
+    """
+    Read a saved HTML file and extract its job URL (worker-thread safe).
+    Returns (job_url, None) or (None, error).
+    """
+    try:
+        # Saved HTML is the raw payload; search the bytes rather than
+        # decoding the whole file
+        with open(html_path, 'rb') as f:
+            payload = f.read()
+    except OSError as e:
+        return None, e
+    return extract_job_url_from_html_bytes(payload), None
+
+
 def reprocess_job_urls(force_update=False):
     """
     Reprocess existing job records to extract and store job URLs.
@@ -59,59 +211,61 @@ def reprocess_job_urls(force_update=False):
     skipped_count = 0
     error_count = 0
     
+    # Scan the html directory once rather than once per record
+    html_index = build_html_index('html')
+    
     with gdata.gdata(gdbm_file=database_path, mode="w") as db:
-        # Get all message IDs
-        all_keys = list(db.keys())
-        print(f"Found {len(all_keys)} records in database")
+        # One sequential pass over the records to pick out those needing
+        # a URL; the db is only written after it
+        candidates = []  # (msg_id, email_data, html_path)
+        record_count = 0
         
-        for msg_id in all_keys:
-            if msg_id.startswith('_'):  # Skip metadata keys
+        for msg_id, email_data in db.items():
+            # Skip metadata keys (M:* sets, date sets, '_' keys)
+            if msg_id.startswith('_') or not isinstance(email_data, dict):
                 continue
-                
-            try:
-                email_data = db[msg_id]
-                
-                # Skip if URL already exists and not forcing update
-                if not force_update and email_data.get('job_url'):
-                    skipped_count += 1
+            record_count += 1
+            
+            # Skip if URL already exists and not forcing update
+            if not force_update and email_data.get('job_url'):
+                skipped_count += 1
+                continue
+            
+            # Find corresponding HTML file
+            # Clean message ID for filename matching
+            clean_msg_id = msg_id.translate(_CLEAN_MSGID_TRANS)
+            html_path = find_html_file(html_index, clean_msg_id)
+            if html_path:
+                candidates.append((msg_id, email_data, html_path))
+            else:
+                print(f"No HTML file found for: {msg_id}")
+        
+        print(f"Found {record_count} records in database")
+        
+        # File reads are independent and I/O bound, so overlap them in
+        # worker threads; gdbm is not thread-safe, so writes stay here
+        max_workers = min(32, (os.cpu_count() or 1) * 4)
+        with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
+            results = executor.map(lambda c: _read_job_url(c[2]), candidates)
+            
+            for (msg_id, email_data, html_path), (job_url, error) in zip(candidates, results):
+                if error is not None:
+                    print(f"Error reading HTML file {html_path}: {error}")
+                    error_count += 1
+                    continue
+                if not job_url:
+                    print(f"No job URL found in HTML file for: {msg_id}")
                     continue
                 
-                # Find corresponding HTML file
-                html_file_found = False
-                html_dir = 'html'
-                
-                if os.path.exists(html_dir):
-                    # Clean message ID for filename matching
-                    
-                    for filename in os.listdir(html_dir):
-                        if clean_msg_id in filename and filename.endswith('.html'):
-                            html_path = os.path.join(html_dir, filename)
-                            
-                            try:
-                                with open(html_path, 'r', encoding='utf-8', errors='ignore') as f:
-                                    html_content = f.read()
-                                    
-                                job_url = extract_job_url_from_html(html_content)
-                                
-                                if job_url:
-                                    # Update the record with the job URL
-                                    email_data['job_url'] = job_url
-                                    db[msg_id] = email_data
-                                    updated_count += 1
-                                    print(f"Updated {msg_id}: {job_url[:80]}...")
-                                    html_file_found = True
-                                    break
-                                    
-                            except (OSError, UnicodeDecodeError) as e:
-                                print(f"Error reading HTML file {html_path}: {e}")
-                                error_count += 1
-                
-                if not html_file_found:
-                    print(f"No HTML file found for: {msg_id}")
-                    
-            except (OSError, KeyError, ValueError) as e:
-                print(f"Error processing {msg_id}: {e}")
-                error_count += 1
+                # Update the record with the job URL
+                email_data['job_url'] = job_url
+                try:
+                    db[msg_id] = email_data
+                    updated_count += 1
+                    print(f"Updated {msg_id}: {job_url[:80]}...")
+                except (OSError, KeyError, ValueError) as e:
+                    print(f"Error processing {msg_id}: {e}")
+                    error_count += 1
     
     print(f"\nReprocessing complete:")
     print(f"  Updated: {updated_count}")
@@ -124,6 +278,10 @@ def decode_header_value(header_value):
     """Decode RFC 2047 encoded header values"""
     if not header_value:
         return ""
+    # Plain headers carry no RFC 2047 encoded-words; decode_header would
+    # hand them back unchanged anyway
+    if isinstance(header_value, str) and '=?' not in header_value:
+        return header_value
     
     decoded_parts = email.header.decode_header(header_value)
     result = []
@@ -134,42 +292,40 @@ def decode_header_value(header_value):
             result.append(part)
     return ''.join(result)
 
-def extract_headers(msg):
+@functools.lru_cache(maxsize=4096)
+def parse_date_header(value):
+    """Parse an RFC 2822 Date header (cached: alert batches share timestamps)"""
+    return email.utils.parsedate_to_datetime(value)
+
+def extract_headers(msg, log=print):
     """
     Extract relevant headers from email message.
     Excludes: envelope From, X-* headers, Received, DKIM-Signature
-    Decodes encoded headers and handles multi-value headers as lists.
+    Decodes encoded headers (Date is parsed to a datetime) and handles
+    multi-value headers as lists. Errors are reported through log.
     """
-    headers = {}
-    skip_headers = {'DKIM-Signature', 'Received'}
+    buckets = collections.defaultdict(list)
     
     for key, value in msg.items():
         # Skip unwanted headers
-        if key.startswith('X-') or key in skip_headers:
+        if key[:2] == 'X-' or key in _SKIP_HEADERS:
             continue
-            
-        # Decode the header value
-        decoded_value = decode_header_value(value)
         
         # Special handling for Date header
         if key == 'Date':
             try:
-                decoded_value = email.utils.parsedate_to_datetime(value)
+                value = parse_date_header(str(value))
             except (TypeError, ValueError, OverflowError) as e:
-                print(f"ERROR: Could not parse date '{value}': {e}")
+                log(f"ERROR: Could not parse date '{value}': {e}")
                 # Skip due to signal parsing failure
                 continue
-        
-        # Handle multiple occurrences of same header
-        if key in headers:
-            # Convert to list if not already
-            if not isinstance(headers[key], list):
-                headers[key] = [headers[key]]
-            headers[key].append(decoded_value)
         else:
-            headers[key] = decoded_value
+            value = decode_header_value(value)
+        
+        buckets[key].append(value)
     
-    return headers
+    # Multiple occurrences of the same header stay as a list
+    return {k: v[0] if len(v) == 1 else v for k, v in buckets.items()}
 
 def get_date_key(sent_datetime):
     """Convert datetime to YYYYMMDD format for date set keys"""
@@ -178,15 +334,117 @@ def get_date_key(sent_datetime):
     return None
 
 def serialize_datetime(obj):
-    """Convert datetime objects to ISO strings for JSON storage"""
+    """
+    Convert datetime objects to ISO strings for JSON storage.
+    Containers holding no datetimes are returned as-is rather than copied;
+    only the path down to a converted value is rebuilt.
+    """
     if isinstance(obj, datetime.datetime):
         return obj.isoformat()
     elif isinstance(obj, dict):
-        return {k: serialize_datetime(v) for k, v in obj.items()}
+        out = None
+        for k, v in obj.items():
+            new = serialize_datetime(v)
+            if new is not v:
+                if out is None:
+                    out = dict(obj)
+                out[k] = new
+        return obj if out is None else out
     elif isinstance(obj, list):
-        return [serialize_datetime(item) for item in obj]
+        out = None
+        for i, item in enumerate(obj):
+            new = serialize_datetime(item)
+            if new is not item:
+                if out is None:
+                    out = list(obj)
+                out[i] = new
+        return obj if out is None else out
     return obj
 
+def json_default(obj):
+    """json.dump default hook: write datetimes as ISO strings"""
+    if isinstance(obj, datetime.datetime):
+        return obj.isoformat()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+def dump_parsed_json(parsed_job):
+    """Encode a parsed job as indented UTF-8 JSON bytes for parsed/"""
+    if orjson is not None:
+        # orjson writes datetimes as ISO strings itself; anything else
+        # unserialisable raises TypeError through json_default, as json does
+        return orjson.dumps(parsed_job, option=orjson.OPT_INDENT_2, default=json_default)
+    return json.dumps(parsed_job, indent=2, ensure_ascii=False, default=json_default).encode('utf-8')
+
+def write_if_changed(path, data, mtime, check_content=False):
+    """
+    Write data (bytes) to path and set its mtime, unless the file is
+    already there with the same size and mtime (reprocessing case).
+    With check_content the existing bytes must match too: derived output
+    (parsed JSON) can change while keeping its length and the mail's mtime.
+    Returns True if the file was written.
+    """
+    try:
+        st = os.stat(path)
+        if st.st_size == len(data) and int(st.st_mtime) == int(mtime):
+            if not check_content:
+                return False
+            with open(path, 'rb') as fd:
+                if fd.read() == data:
+                    return False
+    except FileNotFoundError:
+        pass
+    with open(path, 'wb') as fd:
+        fd.write(data)
+    os.utime(path, (mtime, mtime))
+    return True
+
+def find_html_part(msg):
+    """Return the first text/html leaf part of msg, or None"""
+    if hasattr(msg, 'get_body'):
+        # email.message.EmailMessage knows its own body layout
+        return msg.get_body(preferencelist=('html',))
+    # Depth-first over the payload lists, stopping at the first match
+    if not msg.is_multipart():
+        return msg if msg.get_content_type() == 'text/html' else None
+    for sub in msg.get_payload():
+        part = find_html_part(sub)
+        if part is not None:
+            return part
+    return None
+
+def _hash_id(value):
+    """16-byte digest standing in for a Message-ID in the packed id sets"""
+    return hashlib.blake2s(value.encode('utf-8'), digest_size=16).digest()
+
+def load_id_set(db, key):
+    """
+    Load a membership-only set of _hash_id digests (see save_id_set).
+    Sets still stored as a list of Message-IDs are hashed on load.
+    """
+    try:
+        value = db[key]
+    except KeyError:
+        return set()
+    if isinstance(value, list):
+        return {_hash_id(v) for v in value}
+    if isinstance(value, str):
+        blob = base64.b64decode(value)
+        return {blob[i:i + 16] for i in range(0, len(blob), 16)}
+    return set()
+
+def save_id_set(db, key, id_set):
+    """
+    Save a set of digests as one base64 string of the sorted, concatenated
+    16-byte values (fixed width, no per-id JSON); delete key if empty.
+    """
+    if id_set:
+        db[key] = base64.b64encode(b''.join(sorted(id_set))).decode('ascii')
+    else:
+        try:
+            del db[key]
+        except KeyError:
+            pass
+
 def load_metadata_set(db, key): # XXX Should not work like this
     """Load a metadata set from gdata, return empty set if not exists"""
     try:
@@ -207,205 +465,254 @@ def save_metadata_set(db, key, value_set): # XXX Should not work like this
         except KeyError:
             pass
 
-def cleanup_old_emails(db, cutoff_date, deleted):
+def _processed_key(msg_id, uidl):
+    """
+    M:fully_processed entry for an email stored with its job_type.
+    The UIDL is part of the key: the same Message-ID under a new UIDL
+    is still reprocessed.
+    """
+    return _hash_id(f'{uidl} {msg_id}')
+
+def load_date_keys_index(db, rescan=False):
+    """
+    Load the M:date_keys set naming every YYYYMMDD date set in the db.
+    Databases written before the index existed, or rescan=True, get it
+    (re)built by one full key scan.
+    """
+    index = load_metadata_set(db, 'M:date_keys')
+    if rescan or not index:
+        index |= {k for k in db.keys() if k.isdigit() and len(k) == 8}
+    return index
+
+def cleanup_old_emails(db, cutoff_date, deleted, fully_processed, *, rescan=False):
     """
     Clean up emails older than cutoff_date
-    Returns list of UIDLs to delete.
+    With rescan=True, also pick up date sets missing from M:date_keys.
+    Cleaned emails leave fully_processed (their mail is deleted, so the
+    UIDL never comes back). Returns list of UIDLs to delete.
     """
     to_delete = []
     cutoff_key = cutoff_date.strftime('%Y%m%d')
     
-    # Find all date keys older than cutoff
-    all_keys = db.keys() # expensive
-    date_keys = [k for k in all_keys if k.isdigit() and len(k) == 8 and k < cutoff_key]
+    # Find all date keys older than cutoff, from the M:date_keys index
+    date_keys_index = load_date_keys_index(db, rescan=rescan)
+    date_keys = sorted(k for k in date_keys_index if k < cutoff_key)
     
     if not date_keys:
         return to_delete
     
     print(f"Found {len(date_keys)} date sets older than {cutoff_key}")
     
-    for date_key in date_keys:
-        date_set = load_metadata_set(db, date_key)
+    date_sets = {date_key: load_metadata_set(db, date_key) for date_key in date_keys}
+    changed = set()
+    
+    for date_key, date_set in date_sets.items():
+        if not date_set:
+            # indexed but no longer in the db
+            date_keys_index.discard(date_key)
+            continue
         message_ids_to_remove = []
         
         for message_id in date_set:
-            email_data = db[message_id]
-            uidl = email_data.get('UIDL')
-            js_ref = email_data.get('jobserve_ref', 'unknown')
+            rec = EmailRecord.from_db(db[message_id])
+            uidl = rec.uidl
+            js_ref = rec.jobserve_ref or 'unknown'
             
             if uidl:
                 print(f"CLEANUP: Marking for deletion: {message_id} (JS ref={js_ref}, UIDL={uidl}, date={date_key})")
                 to_delete.append(uidl)
-                deleted.add(message_id)
+                deleted.add(_hash_id(message_id))
+                fully_processed.discard(_processed_key(message_id, uidl))
                 message_ids_to_remove.append(message_id)
         
         # Remove cleaned message IDs from date set
-        for message_id in message_ids_to_remove:
-            date_set.discard(message_id)
-        
-        save_metadata_set(db, date_key, date_set)
+        if message_ids_to_remove:
+            date_set.difference_update(message_ids_to_remove)
+            changed.add(date_key)
+    
+    # Write back only the sets that lost members
+    for date_key in changed:
+        save_metadata_set(db, date_key, date_sets[date_key])
+        if not date_sets[date_key]:
+            # save_metadata_set deleted the now-empty key
+            date_keys_index.discard(date_key)
     
+    save_metadata_set(db, 'M:date_keys', date_keys_index)
     return to_delete
-import pdb
-def process_js_mails(js_emails):
+
+def _process_one(uidl, msg):
     """
-    Process JobServe emails and store to gdata database.
-    Returns list of UIDLs that can be deleted from mail server.
+    Per-email work for process_js_mails that needs no database access:
+    classify, save the HTML/parsed JSON artifacts and parse the job.
+    Safe to run in a worker thread. Returns (log lines, result): the
+    caller prints the lines, so output is not interleaved across emails,
+    and stores the result dict (None if the email should be skipped).
     """
-    gdbm_path = os.path.join(home, DATABASE_FILENAME)
-    
-    to_delete_uidls = []
-    newly_processed_message_ids = []  # Track new jobs for LLM processing
-
-    db=gdata.gdata(gdbm_path) # gdbm closes on scope exit too
-    # Load metadata sets
-    broken_out = load_metadata_set(db, 'M:broken_out')
-    parsed = load_metadata_set(db, 'M:parsed')
-    deleted = load_metadata_set(db, 'M:deleted')
+    lines = []
+    def log(*args):
+        lines.append(' '.join(map(str, args)))
+
+    # XXX
+    # Convert UIDL to int if it's bytes
+    uidl = int(uidl)
+
+    msg_id = msg['Message-ID']
+    decoded_msgid = decode_header_value(msg_id)
+    log(f'\nProcessing: {msg_id}')
+    # assuming message id's are in angle brackets.
+    # if we find they are not, maybe we will add them
+    # but for now error out if they are not
+    if not ( msg_id.startswith('<') and msg_id.endswith('>') ):
+        log('ERR', '!'*10)
+
+    subject = msg.get('Subject', '')
+    decoded_subject = decode_header_value(subject)
+    log(f'Subject: {decoded_subject}')
+
+    # Determine job type and filter for JobServe job emails
+    job_type = None
+    # XXX Should not need to mess with case; automated messages
+    # should not change, if it changes it is not automated.
+    # also more precise parsing of subject would be better
+    if 'job suggestion' in decoded_subject.lower():
+        job_type = 'suggestion'
+        log(f"Processing JOB SUGGESTION: {decoded_subject}")
+    elif 'job alert' in decoded_subject.lower():
+        job_type = 'alert'
+        log(f"Processing JOB ALERT: {decoded_subject}")
+    else:
+        log(f"Skipping non-job email: {decoded_subject}")
+        return lines, None
 
-    # Process each email
-    for uidl, msg in js_emails:
-        # XXX
-        # Convert UIDL to int if it's bytes
-        uidl = int(uidl)
+    # Extract and process headers
+    headers = extract_headers(msg, log)
 
-        msg_id = msg['Message-ID']
-        print(f'\nProcessing: {msg_id}')
-        # assuming message id's are in angle brackets.
-        # if we find they are not, maybe we will add them
-        # but for now error out if they are not
-        if not ( msg_id.startswith('<') and msg_id.endswith('>') ):
-            print('ERR', '!'*10)
-
-        subject = msg.get('Subject', '')
-        decoded_subject = decode_header_value(subject)
-        print(f'Subject: {decoded_subject}')
-
-        # Determine job type and filter for JobServe job emails
-        job_type = None
-        # XXX Should not need to mess with case; automated messages
-        # should not change, if it changes it is not automated.
-        # also more precise parsing of subject would be better
-        if 'job suggestion' in decoded_subject.lower():
-            job_type = 'suggestion'
-            print(f"Processing JOB SUGGESTION: {decoded_subject}")
-        elif 'job alert' in decoded_subject.lower():
-            job_type = 'alert'
-            print(f"Processing JOB ALERT: {decoded_subject}")
-        else:
-            print(f"Skipping non-job email: {decoded_subject}")
-            continue
+    if 'Date' not in headers:
+        log("ERROR: Failed to parse Date header, cannot process this email properly")
+        # XXX maybe need better solution
+        return lines, None  # Can't store without valid date
 
-        # Extract and process headers
-        headers = extract_headers(msg)
+    sent_date = headers['Date']
+    log(f'Date: {sent_date}')
 
-        if 'Date' not in headers:
-            print("ERROR: Failed to parse Date header, cannot process this email properly")
-            # XXX maybe need better solution
-            continue  # Skip to next email - can't store without valid date
+    # Save HTML and parse
+    parsed_job = None
+    job_url = None
+    html_saved = False
 
-        sent_date = headers['Date']
-        print(f'Date: {sent_date}')
+    part = find_html_part(msg)
+    if part is not None:
+        # Save HTML file
+        base_fn = '.'.join([decoded_subject, decoded_msgid, str(uidl)])
+        base_fn = base_fn.translate(_PATH_SEP_TRANS)
+        fn = f'html{os.sep}{base_fn}.html'
 
-        # Save HTML and parse
-        parsed_job = None
-        html_saved = False
+        mod_timestamp = sent_date.timestamp()
 
-        for part in msg.walk():
-            if part.is_multipart():
-                continue
+        try:
+            payload = part.get_payload(decode=True)
+            if write_if_changed(fn, payload, mod_timestamp):
+                log(f"Save HTML to: {fn}")
+            else:
+                log(f"HTML already saved: {fn}")
 
-            if part.get_content_type() == "text/html":
-                # Save HTML file
-                fn = '.'.join([decode_header_value(msg.get(h, '')) 
-                              for h in ['Subject', 'Message-ID']] + [str(uidl), 'html'])
-                fn = 'html' + os.sep + '_'.join(fn.split(os.sep))
+            html_saved = True
+        except (OSError, IOError, UnicodeDecodeError) as e:
+            log(f"ERROR: Failed to save HTML file: {e}")
+            log(traceback.format_exc().rstrip())
 
-                try:
-                    payload = part.get_payload(decode=True)
-                    print(f"Save HTML to: {fn}")
+        if html_saved:
+            charset = part.get_content_charset() or 'utf-8'
 
-                    os.makedirs('html', exist_ok=True)
-                    with open(fn, 'wb') as fd:
-                        fd.write(payload)
-
-                    if sent_date and isinstance(sent_date, datetime.datetime):
-                        mod_timestamp = sent_date.timestamp()
-                        os.utime(fn, (mod_timestamp, mod_timestamp))
+            # Extract job URL straight from the payload bytes, before (and
+            # regardless of) decoding for the parser
+            if charset.lower().startswith(('utf-16', 'utf-32')):
+                job_url = extract_job_url_from_html(payload.decode(charset, errors='ignore'))
+            else:
+                job_url = extract_job_url_from_html_bytes(payload, charset)
+            if job_url:
+                log(f"Extracted job URL: {job_url[:80]}...")
 
-                    html_saved = True
-                except (OSError, IOError, UnicodeDecodeError) as e:
-                    print(f"ERROR: Failed to save HTML file: {e}")
-                    traceback.print_exc()
-                    continue
+            try:
+                html_content = payload.decode(charset)
+            except UnicodeDecodeError as e:
+                log(f"ERROR: Failed to decode HTML: {e}")
+                html_content = None
 
-                # Parse the email
+            # Parse the email
+            if html_content is not None:
                 try:
-                    charset = part.get_content_charset() or 'utf-8'
-                    html_content = payload.decode(charset)
                     parsed_job = js_email.parse_jobserve_email_part(html_content)
-                    print(f"Parsed job: {parsed_job.get('job_title', 'Unknown')}")
-
-                    # Extract job URL from HTML
-                    job_url = extract_job_url_from_html(html_content)
-                    if job_url:
-                        print(f"Extracted job URL: {job_url[:80]}...")
+                    log(f"Parsed job: {parsed_job.get('job_title', 'Unknown')}")
 
                     # Save parsed JSON
-                    base_fn = '.'.join([decode_header_value(msg.get(h, '')) 
-                                       for h in ['Subject', 'Message-ID']] + [str(uidl)])
-                    base_fn = '_'.join(base_fn.split(os.sep))
-                    parsed_fn = 'parsed' + os.sep + base_fn + '.json'
+                    parsed_fn = f'parsed{os.sep}{base_fn}.json'
 
-                    os.makedirs('parsed', exist_ok=True)
-                    with open(parsed_fn, 'w', encoding='utf-8') as fd:
-                        json.dump(serialize_datetime(parsed_job), fd, indent=2, ensure_ascii=False)
-
-                    if sent_date and isinstance(sent_date, datetime.datetime):
-                        os.utime(parsed_fn, (mod_timestamp, mod_timestamp))
+                    write_if_changed(parsed_fn, dump_parsed_json(parsed_job), mod_timestamp,
+                                     check_content=True)
 
                 except (UnicodeDecodeError, KeyError, AttributeError, ValueError) as e:
-                    print(f"ERROR: Failed to parse email: {e}")
-                    traceback.print_exc()
+                    log(f"ERROR: Failed to parse email: {e}")
+                    log(traceback.format_exc().rstrip())
                     parsed_job = None
-                    job_url = None
-
-                break  # Only process first HTML part
-
-        if not html_saved:
-            print("Warning: No HTML part found in email")
-            continue
 
-        # Get JobServe ref for metadata/indexing
-        js_ref = parsed_job.get('ref') if parsed_job else None
+    if not html_saved:
+        log("Warning: No HTML part found in email")
+        return lines, None
 
-        # Use Message-ID as primary key
-        msg_id = msg_id
+    return lines, {
+        'msg_id': msg_id,
+        'uidl': uidl,
+        'job_type': job_type,
+        'headers': headers,
+        'sent_date': sent_date,
+        'parsed_job': parsed_job,
+        'job_url': job_url,
+    }
 
-        # Prepare data to store - gdata class handles JSON serialization
-        email_data = {
-            'headers': serialize_datetime(headers),
-            'UIDL': uidl,
-            'jobserve_ref': js_ref,  # Store JobServe ref as metadata
-            'job_type': job_type,    # Track whether this is 'suggestion' or 'alert'
-        }
-        
-        # Add job URL if extracted during current processing
-        if job_url:
-            email_data['job_url'] = job_url
-
-        if parsed_job:
-            email_data['parsed'] = serialize_datetime(parsed_job)
+import pdb
+def process_js_mails(js_emails):
+    """
+    Process JobServe emails and store to gdata database.
+    Returns list of UIDLs that can be deleted from mail server.
+    """
+    gdbm_path = os.path.join(home, DATABASE_FILENAME)
+    
+    to_delete_uidls = []
+    newly_processed_message_ids = []  # Track new jobs for LLM processing
 
-        # Check for existing entry
+    db=gdata.gdata(gdbm_path) # gdbm closes on scope exit too
+    # Load metadata sets
+    broken_out = load_id_set(db, 'M:broken_out')
+    parsed = load_id_set(db, 'M:parsed')
+    deleted = load_id_set(db, 'M:deleted')
+    fully_processed = load_id_set(db, 'M:fully_processed')  # see _processed_key
+    pending_date_updates = {}  # date_key -> Message-IDs to add
+
+    os.makedirs('html', exist_ok=True)
+    os.makedirs('parsed', exist_ok=True)
+
+    # Drop emails already stored before any worker walks, writes or parses
+    # them; the fully_processed set answers the common case without
+    # loading the stored record
+    todo = []
+    for uidl, msg in js_emails:
+        msg_id = msg['Message-ID']
+        uidl = int(uidl)
+        processed_key = _processed_key(msg_id, uidl)
+        if processed_key in fully_processed:
+            print(f"WARNING: Duplicate processing of same email (Message-ID={msg_id}) - already has job_type")
+            continue
         try:
-            existing_data = db[msg_id]
-            existing_uidl = existing_data.get('UIDL')
-            existing_job_type = existing_data.get('job_type')
+            existing = EmailRecord.from_db(db[msg_id])
+            existing_uidl = existing.uidl
+            existing_job_type = existing.job_type
 
             # If already processed with same UIDL and job_type present, skip reprocessing
             if existing_uidl == uidl and existing_job_type is not None:
                 print(f"WARNING: Duplicate processing of same email (Message-ID={msg_id}) - already has job_type '{existing_job_type}'")
+                # Record stored before M:fully_processed existed
+                fully_processed.add(processed_key)
                 continue
             else:
                 # Either different UIDL (rare) or missing job_type (older entry) - allow update
@@ -413,114 +720,126 @@ def process_js_mails(js_emails):
         except KeyError:
             # No existing entry, this is normal
             pass
+        todo.append((uidl, msg))
+
+    # File writes and HTML parsing are independent per email, so run them
+    # in worker threads; gdbm is not thread-safe, so all db access below
+    # stays on this thread. map() hands results back in input order, so
+    # each email's log comes out in one piece.
+    with concurrent.futures.ThreadPoolExecutor(max_workers=8) as executor:
+        for lines, result in executor.map(lambda item: _process_one(*item), todo):
+            print('\n'.join(lines))
+            if result is None:
+                continue
+            msg_id = result['msg_id']
+            uidl = result['uidl']
+            job_type = result['job_type']
+            headers = result['headers']
+            sent_date = result['sent_date']
+            parsed_job = result['parsed_job']
+            job_url = result['job_url']
+
+            # Get JobServe ref for metadata/indexing
+            js_ref = parsed_job.get('ref') if parsed_job else None
+
+            # Use Message-ID as primary key
+            msg_id = msg_id
+
+            processed_key = _processed_key(msg_id, uidl)
+            if processed_key in fully_processed:
+                # Same email twice in this batch; the first copy was stored
+                print(f"WARNING: Duplicate processing of same email (Message-ID={msg_id}) - already has job_type")
+                continue
 
-        # Check if job URL is missing and try to extract it from HTML file
-        if 'job_url' not in email_data or not email_data['job_url']:
-            print("Job URL missing, attempting to extract from HTML file...")
-            
-            # Find corresponding HTML file
-            html_dir = 'html'
-            if os.path.exists(html_dir):
-                clean_msg_id = msg_id.replace('<', '').replace('>', '')
-                
-                for filename in os.listdir(html_dir):
-                    if clean_msg_id in filename and filename.endswith('.html'):
-                        html_path = os.path.join(html_dir, filename)
-                        
-                        try:
-                            with open(html_path, 'r', encoding='utf-8', errors='ignore') as f:
-                                html_content = f.read()
-                                
-                            extracted_url = extract_job_url_from_html(html_content)
-                            
-                            if extracted_url:
-                                email_data['job_url'] = extracted_url
-                                print(f"Extracted job URL: {extracted_url[:80]}...")
-                            else:
-                                print("No job URL found in HTML file")
-                            break
-                                
-                        except Exception as e:
-                            print(f"Error reading HTML file {html_path}: {e}")
-            else:
-                print("HTML directory not found")
-
-        # Store to gdata (it handles JSON serialization automatically)
-        try:
-            db[msg_id] = email_data
-            print(f"Stored to gdata with key: {msg_id}")
-            if js_ref:
-                print(f"  JobServe ref: {js_ref}")
-            if email_data.get('job_url'):
-                print(f"  Job URL: {email_data['job_url'][:50]}...")
+            # Prepare data to store - gdata class handles JSON serialization
+            rec = EmailRecord(
+                headers=serialize_datetime(headers),  # only Date converts
+                uidl=uidl,
+                jobserve_ref=js_ref,
+                job_type=job_type,
+                job_url=job_url,     # if extracted during current processing
+                parsed=parsed_job,
+            )
+
+            # Store to gdata (it handles JSON serialization automatically)
+            try:
+                db[msg_id] = rec.to_db()
+                print(f"Stored to gdata with key: {msg_id}")
+                if js_ref:
+                    print(f"  JobServe ref: {js_ref}")
+                if rec.job_url:
+                    print(f"  Job URL: {rec.job_url[:50]}...")
             
-            # Track newly processed job for LLM analysis
-            newly_processed_message_ids.append(msg_id)
+                # Track newly processed job for LLM analysis
+                newly_processed_message_ids.append(msg_id)
+                fully_processed.add(processed_key)
             
-        except (OSError, IOError, KeyError) as e:
-            print(f"ERROR: Failed to store to gdata: {e}")
-            traceback.print_exc()
-            continue
+            except (OSError, IOError, KeyError) as e:
+                print(f"ERROR: Failed to store to gdata: {e}")
+                traceback.print_exc()
+                continue
 
-        # Update metadata sets - use Message-ID for tracking
-        broken_out.add(msg_id)
-        if parsed_job:
-            parsed.add(msg_id)
+            # Update metadata sets - use Message-ID for tracking
+            broken_out.add(_hash_id(msg_id))
+            if parsed_job:
+                parsed.add(_hash_id(msg_id))
 
-        # Add to date set
-        if sent_date and isinstance(sent_date, datetime.datetime):
-            date_key = get_date_key(sent_date)
-            if date_key:
-                date_set = load_metadata_set(db, date_key)
-                date_set.add(msg_id)
-                save_metadata_set(db, date_key, date_set)
+            # Add to date set (merged into the db once after the loop)
+            if sent_date and isinstance(sent_date, datetime.datetime):
+                date_key = get_date_key(sent_date)
+                if date_key:
+                    pending_date_updates.setdefault(date_key, set()).add(msg_id)
+
+    for date_key, new_ids in pending_date_updates.items():
+        date_set = load_metadata_set(db, date_key)
+        date_set |= new_ids
+        save_metadata_set(db, date_key, date_set)
+    if pending_date_updates:
+        date_keys_index = load_date_keys_index(db)
+        date_keys_index.update(pending_date_updates)
+        save_metadata_set(db, 'M:date_keys', date_keys_index)
 
     week_ago = datetime.datetime.now() - datetime.timedelta(days=7)
     week_ago_key = week_ago.strftime('%Y%m%d')
     
-    # Open a fresh database context for all metadata operations
-    # Reload and update metadata sets in cleanup context  
-    cleanup_broken_out = load_metadata_set(db, 'M:broken_out')
-    cleanup_parsed = load_metadata_set(db, 'M:parsed')
-    cleanup_deleted = load_metadata_set(db, 'M:deleted')
-    
-    # Add newly processed items to metadata sets
-    cleanup_broken_out.update(broken_out)
-    cleanup_parsed.update(parsed)
-    cleanup_deleted.update(deleted)
+    # broken_out/parsed/deleted were loaded from this same db at the start
+    # and only grown since, so they are saved once, after cleanup
     
-    # Save updated metadata sets first
-    save_metadata_set(db, 'M:broken_out', cleanup_broken_out)
-    save_metadata_set(db, 'M:parsed', cleanup_parsed) 
-    save_metadata_set(db, 'M:deleted', cleanup_deleted)
-    
-    print(f"Checking for emails from {week_ago_key} to clean up...")
-    week_ago_uidls = cleanup_old_emails(db, week_ago, cleanup_broken_out, cleanup_parsed, cleanup_deleted)
+    # On every Nth run also sweep the whole db for date sets the index
+    # missed; the run count persists in the db so the schedule holds
+    # across invocations. (The older-than-a-week dates this used to
+    # re-check are all covered by the single pass below.)
+    try:
+        cleanup_counter = int(db['M:cleanup_counter'])
+    except (KeyError, TypeError, ValueError):
+        cleanup_counter = 0
+    db['M:cleanup_counter'] = cleanup_counter + 1
+    rescan = cleanup_counter % OLD_DATE_CLEANUP_FREQUENCY == 0
+
+    print(f"Checking for emails before {week_ago_key} to clean up{' (full rescan)' if rescan else ''}...")
+    week_ago_uidls = cleanup_old_emails(db, week_ago, deleted, fully_processed, rescan=rescan)
     to_delete_uidls.extend(week_ago_uidls)
     print(f"Added {len(week_ago_uidls)} UIDLs from week cleanup to deletion list")
 
-    # Occasionally check for even older dates
-    if random.randint(0, OLD_DATE_CLEANUP_FREQUENCY - 1) < 2:
-        print(f"Performing occasional cleanup of dates older than {week_ago_key}...")
-        older_date = week_ago - datetime.timedelta(days=1)
-        older_uidls = cleanup_old_emails(db, older_date, cleanup_broken_out, cleanup_parsed, cleanup_deleted)
-        to_delete_uidls.extend(older_uidls)
-        print(f"Added {len(older_uidls)} UIDLs from older cleanup to deletion list")
-
     # Save final metadata sets after cleanup
-    save_metadata_set(db, 'M:broken_out', cleanup_broken_out)
-    save_metadata_set(db, 'M:parsed', cleanup_parsed)
-    save_metadata_set(db, 'M:deleted', cleanup_deleted)
+    save_id_set(db, 'M:broken_out', broken_out)
+    save_id_set(db, 'M:parsed', parsed)
+    save_id_set(db, 'M:deleted', deleted)
+    save_id_set(db, 'M:fully_processed', fully_processed)
 
     print(f"\nProcessing complete. {len(to_delete_uidls)} emails marked for deletion.")
     
     print("to_delete_uidls:", *to_delete_uidls)
+
+    # Release the database before the analyzer opens it for its own updates
+    db.close()
         
     # Process newly downloaded jobs with LLM analysis if any
     if newly_processed_message_ids:
+        import analyze_jobs_openai
         print(f"\nStarting LLM analysis for {len(newly_processed_message_ids)} newly processed JobServe jobs...")
         # Call LLM processor with the newly processed message IDs
-        success = analyze_jobs_openai.main(argv=[], message_ids=newly_processed_message_ids)
+        success = analyze_jobs_openai.main(argv=[], message_ids=newly_processed_message_ids) == 0
         print(
             "JobServe LLM analysis completed" , "successfully" if success else "with errors")
     else:
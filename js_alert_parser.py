@@ -1,9 +1,206 @@
 import re
 if __name__!="__main__": print("Module:", __name__)
 from datetime import datetime
-import html
+import io
 from html.parser import HTMLParser
 
+try:
+    import lxml.html  # optional; libxml2 tree parser for the alert fields
+except ImportError:
+    lxml = None
+
+# Every field _AlertParser fills needs one of these substrings in the
+# HTML (metadata is only read after a description); without any of them
+# the parse is skipped
+_MARKERS = ("heading", "font-size: 18px", "padding-top: 7px")
+# Metadata line label -> result field
+_META_KEYS = {
+    "Employment Business": "employment_business",
+    "Employment Agency": "employment_business",
+    "Company": "employment_business",
+    "Ref": "ref",
+    "Posted": "posted",
+}
+# What a parse of HTML with none of the markers returns
+_EMPTY_RESULT = {
+    "job_title": None,
+    "job_url": None,
+    "location": None,
+    "salary": None,
+    "work_type": None,
+    "description": None,
+    "employment_business": None,
+    "ref": None,
+    "posted": None,
+}
+
+
+def _attr(attrs, name, default=""):
+    """Look up one attribute in HTMLParser's (name, value) list (last wins, as dict() would)"""
+    value = default
+    for key, val in attrs:
+        if key == name:
+            value = val
+    return value
+
+
+def _norm(s):
+    """Normalize whitespace."""
+    # Captured text is already decoded (convert_charrefs=True, or by
+    # lxml); unescaping it again would turn a literal "&amp;" into "&"
+    return " ".join(s.split()) if s else ""
+
+
+def _parse_metadata(content, metadata):
+    """Read "Key: value" lines from the metadata cell into metadata."""
+    for line in content.split("\n"):
+        line = line.strip()
+        # Skip email links
+        if not line or line.startswith("mailto:") or ("@" in line and ":" not in line):
+            continue
+
+        # Parse key: value pairs
+        key, sep, value = line.partition(":")
+        field = _META_KEYS.get(key.strip()) if sep else None
+        if field:
+            metadata[field] = value.strip()
+
+
+class _AlertParser(HTMLParser):
+    """Parse JobServe alert HTML to extract job details."""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self._buf = io.StringIO()  # reused for every captured region
+
+        # Structured data we're extracting
+        self.job_title = None
+        self.job_url = None
+        self.h2_values = []  # Location, salary, work_type
+        self.description_text = None
+        self.metadata = {}  # Employment Business/Agency/Company, Ref, Posted
+
+        # State flags
+        self._in_job_title = False
+        self._in_h2 = False
+        self._in_description_td = False
+        self._in_metadata_td = False
+
+        # Track depth for nested tags
+        self._description_p_depth = 0
+
+    def _reset_capture(self):
+        self._buf.seek(0)
+        self._buf.truncate()
+
+    def handle_starttag(self, tag, attrs):
+        # Job title: <a class="heading" ...>
+        if tag == "a":
+            cls = _attr(attrs, "class")
+            if "heading" in cls:
+                self._in_job_title = True
+                self._reset_capture()
+                # Extract the URL from the href attribute
+                self.job_url = _attr(attrs, "href", None)
+
+        # H2 tags contain location, salary, work_type
+        elif tag == "h2":
+            style = _attr(attrs, "style")
+            if "font-size: 18px" in style:
+                self._in_h2 = True
+                self._reset_capture()
+
+        # Track TD sections
+        elif tag == "td":
+            style = _attr(attrs, "style")
+            # Description TD: padding-top: 7px; padding-bottom: 20px
+            if "padding-top: 7px" in style and "padding-bottom: 20px" in style:
+                self._in_description_td = True
+                self._reset_capture()
+            # Metadata TD: padding-top: 10px; padding-bottom: 8px
+            elif "padding-top: 10px" in style and "padding-bottom: 8px" in style:
+                # Only consider it metadata if we've already captured description
+                if self.description_text:
+                    self._in_metadata_td = True
+                    self._reset_capture()
+
+        # Track P tag depth in description
+        elif tag == "p" and self._in_description_td:
+            self._description_p_depth += 1
+
+        # Handle br tags as newlines
+        elif tag == "br":
+            if self._in_description_td or self._in_metadata_td:
+                self._buf.write("\n")
+
+    def handle_endtag(self, tag):
+        if tag == "td":
+            if self._in_description_td:
+                # Capture the full description content
+                self.description_text = _norm(self._buf.getvalue())
+                self._in_description_td = False
+                self._description_p_depth = 0
+                self._reset_capture()
+            elif self._in_metadata_td:
+                # Parse metadata lines
+                _parse_metadata(self._buf.getvalue(), self.metadata)
+                self._in_metadata_td = False
+                self._reset_capture()
+
+        elif tag == "a" and self._in_job_title:
+            self.job_title = _norm(self._buf.getvalue())
+            self._in_job_title = False
+            self._reset_capture()
+
+        elif tag == "h2" and self._in_h2:
+            value = _norm(self._buf.getvalue())
+            # Skip empty h2 values
+            if value:
+                self.h2_values.append(value)
+            self._in_h2 = False
+            self._reset_capture()
+
+        elif tag == "p" and self._in_description_td:
+            self._description_p_depth = max(0, self._description_p_depth - 1)
+
+    def handle_data(self, data):
+        # Text outside a captured region is never read (every capture
+        # starts with _reset_capture), so don't buffer it
+        if not data or not (self._in_job_title or self._in_h2
+                            or self._in_description_td or self._in_metadata_td):
+            return
+        # convert_charrefs=True: entities arrive already decoded
+        self._buf.write(data)
+
+
+def _replay(el, parser):
+    """Feed an lxml element to parser as the start/data/end calls HTMLParser makes."""
+    if isinstance(el.tag, str):  # not a comment or PI
+        parser.handle_starttag(el.tag, el.attrib.items())
+        if el.text:
+            parser.handle_data(el.text)
+        for child in el:
+            _replay(child, parser)
+        parser.handle_endtag(el.tag)
+    if el.tail:
+        parser.handle_data(el.tail)
+
+
+def _lxml_fields(html_content):
+    """
+    _AlertParser's fields from an lxml tree; None if lxml rejects the input.
+    libxml2 does the tokenising; the tree is replayed through _AlertParser
+    so both paths share one capture state machine (and its boundaries).
+    """
+    try:
+        tree = lxml.html.fromstring(html_content)
+    except (ValueError, lxml.etree.ParserError):
+        return None
+    parser = _AlertParser()
+    _replay(tree, parser)
+    return (parser.job_title, parser.job_url, parser.h2_values,
+            parser.description_text, parser.metadata)
+
 
 def parse_jobserve_alert(html_content):
     """Parse a JobServe job alert HTML file and extract structured fields.
@@ -19,187 +216,45 @@ def parse_jobserve_alert(html_content):
         f"parameter must be str, but got {type(html_content)}"
     )
     
-    def _norm(s): 
-        """Normalize whitespace and unescape HTML entities."""
-        return re.sub(r"\s+", " ", html.unescape(s or "")).strip()
+    if not any(m in html_content for m in _MARKERS):
+        return dict(_EMPTY_RESULT)
     
-    class _AlertParser(HTMLParser):
-        """Parse JobServe alert HTML to extract job details."""
-        
-        def __init__(self):
-            super().__init__(convert_charrefs=False)
-            self.text = []
-            self._stack = []
-            self._current_tag = None
-            self._current_attrs = {}
-            self._capture = []
-            
-            # Structured data we're extracting
-            self.job_title = None
-            self.job_url = None
-            self.h2_values = []  # Location, salary, work_type
-            self.description_text = None
-            self.metadata = {}  # Employment Business/Agency/Company, Ref, Posted
-            
-            # State flags
-            self._in_job_title = False
-            self._in_h2 = False
-            self._in_description_td = False
-            self._in_metadata_td = False
-            
-            # Track depth for nested tags
-            self._description_p_depth = 0
-            
-        def handle_starttag(self, tag, attrs):
-            self._stack.append(tag)
-            self._current_tag = tag
-            self._current_attrs = dict(attrs)
-            
-            # Job title: <a class="heading" ...>
-            if tag == "a":
-                cls = self._current_attrs.get("class", "")
-                if "heading" in cls:
-                    self._in_job_title = True
-                    self._capture = []
-                    # Extract the URL from the href attribute
-                    self.job_url = self._current_attrs.get("href")
-            
-            # H2 tags contain location, salary, work_type
-            elif tag == "h2":
-                style = self._current_attrs.get("style", "")
-                if "font-size: 18px" in style:
-                    self._in_h2 = True
-                    self._capture = []
-            
-            # Track TD sections
-            elif tag == "td":
-                style = self._current_attrs.get("style", "")
-                # Description TD: padding-top: 7px; padding-bottom: 20px
-                if "padding-top: 7px" in style and "padding-bottom: 20px" in style:
-                    self._in_description_td = True
-                    self._capture = []
-                # Metadata TD: padding-top: 10px; padding-bottom: 8px
-                elif "padding-top: 10px" in style and "padding-bottom: 8px" in style:
-                    # Only consider it metadata if we've already captured description
-                    if self.description_text:
-                        self._in_metadata_td = True
-                        self._capture = []
-            
-            # Track P tag depth in description
-            elif tag == "p" and self._in_description_td:
-                self._description_p_depth += 1
-            
-            # Handle br tags as newlines
-            elif tag == "br":
-                if self._in_description_td or self._in_metadata_td:
-                    self._capture.append("\n")
-        
-        def handle_endtag(self, tag):
-            if self._stack and self._stack[-1] == tag:
-                self._stack.pop()
-            
-            if tag == "td":
-                if self._in_description_td:
-                    # Capture the full description content
-                    self.description_text = _norm("".join(self._capture))
-                    self._in_description_td = False
-                    self._description_p_depth = 0
-                    self._capture = []
-                elif self._in_metadata_td:
-                    # Parse metadata lines
-                    metadata_content = "".join(self._capture)
-                    lines = [line.strip() for line in metadata_content.split("\n") if line.strip()]
-                    
-                    for line in lines:
-                        # Skip email links
-                        if not line or line.startswith("mailto:") or ("@" in line and ":" not in line):
-                            continue
-                        
-                        # Parse key: value pairs
-                        if ":" in line:
-                            key, value = line.split(":", 1)
-                            key = key.strip()
-                            value = value.strip()
-                            
-                            if key in ["Employment Business", "Employment Agency", "Company"]:
-                                self.metadata["employment_business"] = value
-                            elif key == "Ref":
-                                self.metadata["ref"] = value
-                            elif key == "Posted":
-                                self.metadata["posted"] = value
-                    
-                    self._in_metadata_td = False
-                    self._capture = []
-            
-            elif tag == "a" and self._in_job_title:
-                self.job_title = _norm("".join(self._capture))
-                self._in_job_title = False
-                self._capture = []
-            
-            elif tag == "h2" and self._in_h2:
-                value = _norm("".join(self._capture))
-                # Skip empty h2 values
-                if value:
-                    self.h2_values.append(value)
-                self._in_h2 = False
-                self._capture = []
-            
-            elif tag == "p" and self._in_description_td:
-                self._description_p_depth = max(0, self._description_p_depth - 1)
-        
-        def handle_data(self, data):
-            if not data:
-                return
-            s = html.unescape(data)
-            self.text.append(s)
-            if self._capture is not None:
-                self._capture.append(s)
-        
-        def handle_entityref(self, name): 
-            self.handle_data(f"&{name};")
-        
-        def handle_charref(self, name):  
-            self.handle_data(f"&#{name};")
-    
-    # Parse the HTML
-    parser = _AlertParser()
-    parser.feed(html_content or "")
-    parser.close()
+    # Parse the HTML (libxml2 when available, else the stdlib parser)
+    fields = _lxml_fields(html_content) if lxml is not None else None
+    if fields is None:
+        parser = _AlertParser()
+        parser.feed(html_content or "")
+        parser.close()
+        fields = (parser.job_title, parser.job_url, parser.h2_values,
+                  parser.description_text, parser.metadata)
     
     # Extract structured fields
-    job_title = parser.job_title
-    job_url = parser.job_url
+    job_title, job_url, h2_values, description_text, metadata = fields
     
     # Parse h2 values: location, [salary], work_type
     location = None
     salary = None
     work_type = None
     
-    if len(parser.h2_values) >= 1:
-        location = parser.h2_values[0]
-    if len(parser.h2_values) >= 2:
-        salary = parser.h2_values[1]
-    if len(parser.h2_values) >= 3:
-        work_type = parser.h2_values[2]
+    if len(h2_values) >= 1:
+        location = h2_values[0]
+    if len(h2_values) >= 2:
+        salary = h2_values[1]
+    if len(h2_values) >= 3:
+        work_type = h2_values[2]
     
     # Get metadata
-    employment_business = parser.metadata.get("employment_business")
-    ref = parser.metadata.get("ref")
-    posted = parser.metadata.get("posted")
+    employment_business = metadata.get("employment_business")
+    ref = metadata.get("ref")
+    posted = metadata.get("posted")
     
     # Build complete description with metadata appended
-    description_parts = []
-    if parser.description_text:
-        description_parts.append(parser.description_text)
-    
-    if employment_business:
-        description_parts.append(f"Employment Business: {employment_business}")
-    if ref:
-        description_parts.append(f"Ref: {ref}")
-    if posted:
-        description_parts.append(f"Posted: {posted}")
-    
-    description = "\n".join(description_parts) if description_parts else None
+    description = "\n".join(part for part in (
+        description_text,
+        f"Employment Business: {employment_business}" if employment_business else None,
+        f"Ref: {ref}" if ref else None,
+        f"Posted: {posted}" if posted else None,
+    ) if part) or None
     
     return {
         "job_title": job_title,
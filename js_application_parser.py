@@ -3,6 +3,48 @@ import re
 import html
 from html.parser import HTMLParser
 
+# Label cell (lowercased) -> result field for the value in the next cell
+_LABELS = {
+    'reference:': 'reference',
+    'posted by:': 'posted_by',
+    'contact:': 'contact_name',
+    'telephone:': 'contact_phone',
+    'email:': 'contact_email',
+}
+
+
+def _norm(s):
+    if not s:
+        return ""
+    if "&" in s:  # no entities to decode otherwise
+        s = html.unescape(s)
+    return " ".join(s.split())
+
+
+class _ApplicationSniffer(HTMLParser):
+    """Extract table cell contents in sequence."""
+    def __init__(self):
+        super().__init__(convert_charrefs=False)
+        self.in_td = False
+        self.td_text = []
+        self.all_cells = []
+        
+    def handle_starttag(self, tag, attrs):
+        if tag == 'td':
+            self.in_td = True
+            self.td_text = []
+    
+    def handle_endtag(self, tag):
+        if tag == 'td' and self.in_td:
+            text = ''.join(self.td_text).strip()
+            if text:
+                self.all_cells.append(text)
+            self.in_td = False
+    
+    def handle_data(self, data):
+        if self.in_td:
+            self.td_text.append(data)
+
 
 def parse_jobserve_application_confirmation(html_part: str) -> dict:
     """Parse a JobServe application confirmation email and extract fields.
@@ -18,33 +60,6 @@ def parse_jobserve_application_confirmation(html_part: str) -> dict:
         f"parameter must be str, but got {type(html_part)}"
     )
     
-    def _norm(s): 
-        return re.sub(r"\s+", " ", html.unescape(s or "")).strip()
-    
-    class _ApplicationSniffer(HTMLParser):
-        """Extract table cell contents in sequence."""
-        def __init__(self):
-            super().__init__(convert_charrefs=False)
-            self.in_td = False
-            self.td_text = []
-            self.all_cells = []
-            
-        def handle_starttag(self, tag, attrs):
-            if tag == 'td':
-                self.in_td = True
-                self.td_text = []
-        
-        def handle_endtag(self, tag):
-            if tag == 'td' and self.in_td:
-                text = ''.join(self.td_text).strip()
-                if text:
-                    self.all_cells.append(text)
-                self.in_td = False
-        
-        def handle_data(self, data):
-            if self.in_td:
-                self.td_text.append(data)
-    
     parser = _ApplicationSniffer()
     parser.feed(html_part or "")
     parser.close()
@@ -71,29 +86,28 @@ def parse_jobserve_application_confirmation(html_part: str) -> dict:
     # - Job title, location, work_type, description appear in sequence
     # - Then labeled pairs: Reference: value, Posted By: value, etc.
     
-    # Find reference number (distinctive pattern)
-    for i, cell in enumerate(cells):
-        if cell.lower() == 'reference:' and i + 1 < len(cells):
-            result['reference'] = cells[i + 1]
-        elif cell.lower() == 'posted by:' and i + 1 < len(cells):
-            result['posted_by'] = cells[i + 1]
-        elif cell.lower() == 'contact:' and i + 1 < len(cells):
-            result['contact_name'] = cells[i + 1]
-        elif cell.lower() == 'telephone:' and i + 1 < len(cells):
-            phone = cells[i + 1]
-            # Sometimes phone field is empty and email label follows
-            if phone.lower() != 'email:':
-                result['contact_phone'] = phone
-        elif cell.lower() == 'email:' and i + 1 < len(cells):
-            email_val = cells[i + 1]
-            # Skip if it's just another label
-            if '@' in email_val:
-                result['contact_email'] = email_val
-    
-    # Try to find job details section
-    # Look for the confirmation message, then job details follow
+    # One pass: labelled pairs (later occurrences win) and the first
+    # confirmation message, after which the job details follow
+    found_confirmation = False
     for i, cell in enumerate(cells):
-        if 'applied for the job listed below' in cell.lower():
+        low = cell.lower()
+        field = _LABELS.get(low)
+        if field is not None:
+            if i + 1 >= len(cells):
+                continue
+            value = cells[i + 1]
+            if field == 'contact_phone':
+                # Sometimes phone field is empty and email label follows
+                if value.lower() == 'email:':
+                    continue
+            elif field == 'contact_email':
+                # Skip if it's just another label
+                if '@' not in value:
+                    continue
+            result[field] = value
+        
+        elif not found_confirmation and 'applied for the job listed below' in low:
+            found_confirmation = True
             # Next cells should be: job_title, location, work_type, description
             if i + 1 < len(cells):
                 result['job_title'] = cells[i + 1]
@@ -112,7 +126,6 @@ def parse_jobserve_application_confirmation(html_part: str) -> dict:
                 desc = cells[i + 4]
                 if len(desc) > 30:
                     result['description'] = desc
-            break
     
     return result
 
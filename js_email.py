@@ -1,134 +1,169 @@
 if __name__ != "__main__": print("Module:", __name__)
 import re
 from datetime import datetime
-import html
+import io
 from html.parser import HTMLParser
+
+# Description artifacts from the "View on site"/"Show more" links
+_VIEW_ON_SITE = re.compile(r"\.\.\.\s*View on site$")
+_SHOW_MORE = re.compile(r"\.\.\.\s*Show more")
+
+# Metadata line label -> result field
+_META_KEYS = {
+    "Employment Business": "employment_business",
+    "Employment Agency": "employment_business",
+    "Ref": "ref",
+    "Posted": "posted",
+}
+
+# Every field _Sniffer fills needs one of these substrings in the HTML;
+# without any of them the parse is skipped (tags are matched
+# case-insensitively, attribute values are not)
+_MARKERS = ("heading", "<h2", "<H2", "snippet", "rest", "#7fd6f6")
+# What a parse of HTML with none of the markers returns
+_EMPTY_RESULT = {
+    "job_title": None,
+    "job_url": None,
+    "location": None,
+    "salary": None,
+    "work_type": None,
+    "description": "",
+    "employment_business": None,
+    "ref": None,
+    "posted": None,
+}
+
+
+def _attr(attrs, name, default=""):
+    """Look up one attribute in HTMLParser's (name, value) list (last wins, as dict() would)"""
+    value = default
+    for key, val in attrs:
+        if key == name:
+            value = val
+    return value
+
+
+def _norm(s):
+    # Captured text is already decoded (convert_charrefs=True, or by
+    # lxml); unescaping it again would turn a literal "&amp;" into "&"
+    return " ".join(s.split()) if s else ""
+
+
+class _Sniffer(HTMLParser):
+    """Collect text with tag context to find specific elements."""
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self._buf = io.StringIO()  # reused for every captured region
+
+        # Structured data we're looking for
+        self.job_title = None
+        self.job_url = None
+        self.h2_values = []  # Sequential h2 values after job title
+        self.description_parts = []  # snippet and rest spans
+        self.metadata_lines = []  # Employment Business, Ref, Posted
+
+        self._in_heading = False
+        self._in_h2 = False
+        self._in_snippet = False
+        self._in_rest = False
+        self._in_metadata_td = False  # Track the TD container
+        self._in_metadata_p = False   # Track the P inside it
+
+    def _reset_capture(self):
+        self._buf.seek(0)
+        self._buf.truncate()
+
+    def handle_starttag(self, tag, attrs):
+        # Check for metadata td container
+        if tag == "td":
+            style = _attr(attrs, "style")
+            if "border-bottom: 1px solid #7fd6f6" in style and "padding-top: 10px" in style:
+                self._in_metadata_td = True
+
+        # Check for job title link
+        if tag == "a":
+            cls = _attr(attrs, "class")
+            if "heading" in cls:
+                self._in_heading = True
+                self._reset_capture()
+                # Extract the URL from the href attribute
+                self.job_url = _attr(attrs, "href", None)
+
+        # Check for h2 tags (location, salary, work_type)
+        elif tag == "h2":
+            self._in_h2 = True
+            self._reset_capture()
+
+        # Check for description spans
+        elif tag == "span":
+            cls = _attr(attrs, "class")
+            if "snippet" in cls:
+                self._in_snippet = True
+                self._reset_capture()
+            elif "rest" in cls:
+                self._in_rest = True
+                self._reset_capture()
+
+        # Check for paragraph inside metadata td
+        elif tag == "p" and self._in_metadata_td:
+            self._in_metadata_p = True
+            self._reset_capture()
+
+        # Handle br as newline in metadata
+        elif tag == "br" and self._in_metadata_p:
+            self._buf.write("\n")
+
+    def handle_endtag(self, tag):
+        if tag == "td" and self._in_metadata_td:
+            self._in_metadata_td = False
+
+        if tag == "a" and self._in_heading:
+            self.job_title = _norm(self._buf.getvalue())
+            self._in_heading = False
+            self._reset_capture()
+
+        elif tag == "h2" and self._in_h2:
+            self.h2_values.append(_norm(self._buf.getvalue()))
+            self._in_h2 = False
+            self._reset_capture()
+
+        elif tag == "span" and self._in_snippet:
+            self.description_parts.append(_norm(self._buf.getvalue()))
+            self._in_snippet = False
+            self._reset_capture()
+
+        elif tag == "span" and self._in_rest:
+            self.description_parts.append(_norm(self._buf.getvalue()))
+            self._in_rest = False
+            self._reset_capture()
+
+        elif tag == "p" and self._in_metadata_p:
+            self.metadata_lines = [
+                line.strip() 
+                for line in self._buf.getvalue().split("\n") 
+                if line.strip()
+            ]
+            self._in_metadata_p = False
+            self._reset_capture()
+
+    def handle_data(self, data):
+        # Text outside a captured region is never read (every capture
+        # starts with _reset_capture), so don't buffer it
+        if not data or not (self._in_heading or self._in_h2 or self._in_snippet
+                            or self._in_rest or self._in_metadata_p):
+            return
+        # convert_charrefs=True: entities arrive already decoded
+        self._buf.write(data)
+
+
 def parse_jobserve_email_part(html_part):
     """Parse a JobServe job suggestion email and extract structured fields."""
     assert isinstance(html_part, str), (
         f"parameter must be str, but got {type(html_part)}"
     )
     
-    def _norm(s): 
-        return re.sub(r"\s+", " ", html.unescape(s or "")).strip()
-    
-    class _Sniffer(HTMLParser):
-        """Collect text with tag context to find specific elements."""
-        def __init__(self):
-            super().__init__(convert_charrefs=False)
-            self.text = []
-            self._stack = []
-            self._current_tag = None
-            self._current_attrs = {}
-            self._capture = []
-            
-            # Structured data we're looking for
-            self.job_title = None
-            self.job_url = None
-            self.h2_values = []  # Sequential h2 values after job title
-            self.description_parts = []  # snippet and rest spans
-            self.metadata_lines = []  # Employment Business, Ref, Posted
-            
-            self._in_heading = False
-            self._in_h2 = False
-            self._in_snippet = False
-            self._in_rest = False
-            self._in_metadata_td = False  # Track the TD container
-            self._in_metadata_p = False   # Track the P inside it
-            
-        def handle_starttag(self, tag, attrs):
-            self._stack.append(tag)
-            self._current_tag = tag
-            self._current_attrs = dict(attrs)
-            
-            # Check for metadata td container
-            if tag == "td":
-                style = self._current_attrs.get("style", "")
-                if "border-bottom: 1px solid #7fd6f6" in style and "padding-top: 10px" in style:
-                    self._in_metadata_td = True
-            
-            # Check for job title link
-            if tag == "a":
-                cls = self._current_attrs.get("class", "")
-                if "heading" in cls:
-                    self._in_heading = True
-                    self._capture = []
-                    # Extract the URL from the href attribute
-                    self.job_url = self._current_attrs.get("href")
-            
-            # Check for h2 tags (location, salary, work_type)
-            elif tag == "h2":
-                self._in_h2 = True
-                self._capture = []
-            
-            # Check for description spans
-            elif tag == "span":
-                cls = self._current_attrs.get("class", "")
-                if "snippet" in cls:
-                    self._in_snippet = True
-                    self._capture = []
-                elif "rest" in cls:
-                    self._in_rest = True
-                    self._capture = []
-            
-            # Check for paragraph inside metadata td
-            elif tag == "p" and self._in_metadata_td:
-                self._in_metadata_p = True
-                self._capture = []
-            
-            # Handle br as newline in metadata
-            elif tag == "br" and self._in_metadata_p:
-                self._capture.append("\n")
-        
-        def handle_endtag(self, tag):
-            if self._stack and self._stack[-1] == tag:
-                self._stack.pop()
-            
-            if tag == "td" and self._in_metadata_td:
-                self._in_metadata_td = False
-            
-            if tag == "a" and self._in_heading:
-                self.job_title = _norm("".join(self._capture))
-                self._in_heading = False
-                self._capture = []
-            
-            elif tag == "h2" and self._in_h2:
-                self.h2_values.append(_norm("".join(self._capture)))
-                self._in_h2 = False
-                self._capture = []
-            
-            elif tag == "span" and self._in_snippet:
-                self.description_parts.append(_norm("".join(self._capture)))
-                self._in_snippet = False
-                self._capture = []
-            
-            elif tag == "span" and self._in_rest:
-                self.description_parts.append(_norm("".join(self._capture)))
-                self._in_rest = False
-                self._capture = []
-            
-            elif tag == "p" and self._in_metadata_p:
-                self.metadata_lines = [
-                    line.strip() 
-                    for line in "".join(self._capture).split("\n") 
-                    if line.strip()
-                ]
-                self._in_metadata_p = False
-                self._capture = []
-        
-        def handle_data(self, data):
-            if not data:
-                return
-            s = html.unescape(data)
-            self.text.append(s)
-            if self._capture is not None:
-                self._capture.append(s)
-        
-        def handle_entityref(self, name): 
-            self.handle_data(f"&{name};")
-        
-        def handle_charref(self, name):  
-            self.handle_data(f"&#{name};")
+    if not any(m in html_part for m in _MARKERS):
+        return dict(_EMPTY_RESULT)
     
     p = _Sniffer()
     p.feed(html_part or "")
@@ -158,32 +193,27 @@ def parse_jobserve_email_part(html_part):
     # Combine description parts (snippet + rest, filtering out "View on site" links)
     description_text = " ".join(p.description_parts)
     # Remove "View on site" and "... Show more" artifacts
-    description_text = re.sub(r"\.\.\.\s*View on site$", "", description_text)
-    description_text = re.sub(r"\.\.\.\s*Show more", "", description_text)
-    
-    # Parse metadata lines
-    employment_business = None
-    ref = None
-    posted = None
+    description_text = _VIEW_ON_SITE.sub("", description_text)
+    description_text = _SHOW_MORE.sub("", description_text)
     
+    # Parse metadata lines ("Key: value")
+    meta = {}
     for line in p.metadata_lines:
-        if line.startswith("Employment Business:") or line.startswith("Employment Agency:"):
-            employment_business = line.split(":", 1)[1].strip()
-        elif line.startswith("Ref:"):
-            ref = line.split(":", 1)[1].strip()
-        elif line.startswith("Posted:"):
-            posted = line.split(":", 1)[1].strip()
-    
-    # Combine description with metadata
-    description_parts = [description_text]
-    if employment_business:
-        description_parts.append(f"Employment Business: {employment_business}")
-    if ref:
-        description_parts.append(f"Ref: {ref}")
-    if posted:
-        description_parts.append(f"Posted: {posted}")
+        key, sep, value = line.partition(":")
+        field = _META_KEYS.get(key) if sep else None
+        if field:
+            meta[field] = value.strip()
+    employment_business = meta.get("employment_business")
+    ref = meta.get("ref")
+    posted = meta.get("posted")
     
-    description = "\n".join(description_parts)
+    # Combine description (kept even when empty) with metadata
+    description = "\n".join(part for part in (
+        description_text,
+        f"Employment Business: {employment_business}" if employment_business else None,
+        f"Ref: {ref}" if ref else None,
+        f"Posted: {posted}" if posted else None,
+    ) if part is not None)
     
     return {
         "job_title": job_title,
@@ -1,7 +1,20 @@
+import atexit
 import logging
 import logging.handlers
+import queue
 import sys
 
+# Logger name -> QueueListener draining that logger's queue
+_listeners = {}
+
+
+@atexit.register
+def _stop_listeners():
+    # stop() flushes whatever is still queued before the interpreter exits
+    for listener in _listeners.values():
+        listener.stop()
+    _listeners.clear()
+
 
 def get_logger(
     name,
@@ -20,23 +33,32 @@ def get_logger(
         return log
 
     formatter = logging.Formatter(fmt, datefmt=datefmt)
+    handlers = []
 
     if console:
         h = logging.StreamHandler(sys.stderr)
         h.setFormatter(formatter)
-        log.addHandler(h)
+        handlers.append(h)
 
     if logfile:
         h = logging.FileHandler(logfile)
         h.setFormatter(formatter)
-        log.addHandler(h)
+        handlers.append(h)
 
     if syslog:
         h = logging.handlers.SysLogHandler(address="/dev/log")
         h.setFormatter(logging.Formatter(
             "%(name)s: %(levelname)s %(message)s"
         ))
-        log.addHandler(h)
+        handlers.append(h)
 
-    return log
+    if handlers:
+        # Callers only enqueue the record; one background thread does the
+        # stderr/file/syslog I/O
+        q = queue.SimpleQueue()
+        log.addHandler(logging.handlers.QueueHandler(q))
+        listener = logging.handlers.QueueListener(q, *handlers)
+        listener.start()
+        _listeners[name] = listener
 
+    return log
@@ -5,16 +5,22 @@ import email
 import email.utils
 import email.header
 import datetime
+import io
 import random
 import traceback
 import json
 import re
 import argparse
+import concurrent.futures
+import functools
+import hashlib
+import itertools
 import zlib
 import box
 import js_alert_parser # parse_jobserve_alert
 import yaml
-import openai
+# openai is imported where the client is created; importing this module
+# (or the jobserve_parser shim) should not load the SDK
 
 #import pdb
 
@@ -54,32 +60,66 @@ SYSTEM_CONTENT = (
     "4. Any critical blockers (clearance, location, fundamental skill gaps)"
 )
 
+# Define the schema for the LLM output
+SCHEMA_INSTRUCTION = (
+    "Analyze how well this CV matches the job description. "
+    "Respond in JSON with two fields: 'score' (integer 0-10, be discriminating) and 'reason' (string). "
+    "In 'reason', provide a detailed explanation (at least 120-200 words) including: "
+    "key skill matches, experience gaps, seniority fit, domain relevance, and any blockers (e.g., location, clearance). "
+    "Use clear sentences (no bullet lists) to keep it readable. "
+    "Example: {\"score\": 7, \"reason\": \"Strong Python and data experience, but limited MLOps...\"} "
+)
+
+# Concurrent chat completions when scoring without the Batch API; the
+# client's own retries (exponential backoff on 429/timeouts) cover rate limits
+SCORING_WORKERS = 10
+
+# Batch API jobs are accepted with a 24h completion window; each run
+# applies the batches that have finished since the last one
+BATCH_DONE_STATUSES = {'completed', 'failed', 'expired', 'cancelled'}
+
 DATABASE_FILENAME = ('~/.jobserve.gdbm')
+APPLICATIONS_DATABASE_FILENAME = '~/.jobserve_applications.gdbm'
+# Scoring responses by request_key, so an unchanged job/CV/prompt is not re-sent
+LLM_CACHE_FILENAME = '~/.jobserve_llm_cache.gdbm'
+# Submitted Batch API jobs: batch id -> {msg_id: LLM cache key}
+BATCH_STATE_FILENAME = '~/.jobserve_llm_batches.gdbm'
 
-def decode_header_value(header_value):
-    """Decode RFC 2047 encoded header values"""
+# Subject phrase -> job_type, and the message classify_job prints for it;
+# checked in this order, the first phrase found wins
+JOB_TYPES = {
+    'job suggestion': ('suggestion', "JOB SUGGESTION"),
+    'job alert': ('alert', "JOB ALERT"),
+    'Application Confirmation': ('application', "APPLICATION CONFIRMATION"),
+}
 
+@functools.lru_cache(maxsize=4096)
+def _decode_header_str(header_value):
+    """Memoised body of decode_header_value (alert subjects repeat a lot)"""
     return ''.join(
         part
             if encoding is None else
         part.decode(encoding or 'utf-8', errors='replace')
             for part, encoding in 
                  email.header.decode_header(header_value)
-    ) if header_value else ""
+    )
+
+def decode_header_value(header_value):
+    """Decode RFC 2047 encoded header values"""
+    if not header_value:
+        return ""
+    # compat32 hands back a Header object (unhashable) for raw 8-bit headers
+    if isinstance(header_value, str):
+        return _decode_header_str(header_value)
+    return _decode_header_str.__wrapped__(header_value)
 
 def classify_job(subj):
-    if 'job suggestion' in subj:
-        print(f"Processing JOB SUGGESTION: {subj}")
-        return 'suggestion'
-    elif 'job alert' in subj:
-        print(f"Processing JOB ALERT: {subj}")
-        return 'alert'
-    elif 'Application Confirmation' in subj:
-        print(f"Processing APPLICATION CONFIRMATION: {subj}")
-        return 'application'
-    else:
-        print(f"Skipping non-job email: {subj}")
-        return None
+    for phrase, (job_type, label) in JOB_TYPES.items():
+        if phrase in subj:
+            print(f"Processing {label}: {subj}")
+            return job_type
+    print(f"Skipping non-job email: {subj}")
+    return None
 
 def should_skip_job(parsed_job, location_str):
     """
@@ -116,12 +156,200 @@ def should_skip_job(parsed_job, location_str):
     
     return False, None
 
-def process_js_mails(js_emails):
+@functools.lru_cache(maxsize=1)
+def load_cv():
+    """The CV text, read once per process"""
+    cv_file = os.path.expanduser(CV_PATH)
+    with open(cv_file, 'r') as fd:
+        return fd.read()
+
+@functools.lru_cache(maxsize=1)
+def openai_client():
+    """One OpenAI client (and its connection pool) per process"""
+    import openai
+    with open(os.path.expanduser(KEY_PATH + ".yaml"), "r") as fd:
+        client_params = yaml.safe_load(fd.read())
+    return openai.OpenAI(**client_params)
+
+def build_request(parsed_job, cv):
+    """Chat completion arguments for scoring one parsed job against the CV"""
+    # Everything but the job is the same for every request in a run, so
+    # it goes first: OpenAI caches a repeated prompt prefix (>=1024 tokens)
+    return dict(
+        messages=[
+            {"role": "system", "content": SYSTEM_CONTENT},
+            {"role": "user", "content": '\n'.join((SCHEMA_INSTRUCTION, "CV:", cv))},
+            {"role": "user", "content": '\n'.join(("Job Details:", parsed_job['description']))}
+        ],
+        model=MODEL,
+        temperature=0.3,
+        response_format={"type": "json_object"},
+        max_tokens=600
+    )
+
+def request_key(request):
+    """LLM cache key: a change to the model, prompt, parameters, CV or job gives a new key"""
+    return hashlib.sha256(json.dumps(request, sort_keys=True).encode('utf-8')).hexdigest()
+
+def score_jobs_sync(client, requests, workers=SCORING_WORKERS):
+    """
+    Score {msg_id: request} with concurrent chat completions, yielding
+    (msg_id, response JSON) as each one finishes. A request that still
+    fails after the client's retries is reported and left unscored.
+    """
+    def score_one(request):
+        chat_completion = client.chat.completions.create(**request)
+        return chat_completion.choices[0].message.content
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = {executor.submit(score_one, request): msg_id for msg_id, request in requests.items()}
+        for future in concurrent.futures.as_completed(futures):
+            msg_id = futures[future]
+            try:
+                response_json = future.result()
+            except Exception as e:
+                print(f"Scoring {msg_id} failed:", e)
+                traceback.print_exc()
+                continue
+            yield msg_id, response_json
+
+def submit_batch(client, requests):
+    """
+    Submit {msg_id: request} to the OpenAI Batch API (half the cost of
+    synchronous calls, but results may take up to the 24h window) and
+    return the batch id; batch_results() reads it back on a later run.
+    """
+    buf = io.BytesIO()
+    for msg_id, request in requests.items():
+        buf.write(json.dumps({
+            "custom_id": msg_id,
+            "method": "POST",
+            "url": "/v1/chat/completions",
+            "body": request,
+        }).encode('utf-8'))
+        buf.write(b'\n')
+    batch_file = client.files.create(file=('jobs.jsonl', buf.getvalue()), purpose="batch")
+    batch = client.batches.create(
+        input_file_id=batch_file.id,
+        endpoint="/v1/chat/completions",
+        completion_window="24h",
+    )
+    print(f"Submitted batch {batch.id} with {len(requests)} jobs")
+    return batch.id
+
+def batch_results(client, batch_id):
+    """
+    (finished, {msg_id: response JSON}) for a submitted batch; the results
+    stay empty until the batch is done. Failed requests are reported and left out.
+    """
+    batch = client.batches.retrieve(batch_id)
+    print(f"Batch {batch.id}: {batch.status}")
+    if batch.status not in BATCH_DONE_STATUSES:
+        return False, {}
+    results = {}
+    if batch.output_file_id:
+        for line in client.files.content(batch.output_file_id).text.splitlines():
+            if not line:
+                continue
+            result = json.loads(line)
+            response = result.get('response') or {}
+            if response.get('status_code') != 200:
+                print(f"Batch request {result['custom_id']} failed:", result.get('error') or response)
+                continue
+            results[result['custom_id']] = response['body']['choices'][0]['message']['content']
+    return True, results
+
+def collect_batches(batch_db, llm_cache, js_gd):
+    """
+    Apply the results of every finished batch in batch_db to the cache and
+    to the job records in js_gd, then forget the batch. Unfinished batches
+    are left for a later run.
+    """
+    for batch_id, cache_keys in list(batch_db.items()):
+        finished, results = batch_results(openai_client(), batch_id)
+        if not finished:
+            continue
+        for msg_id, response_json in results.items():
+            llm_cache[cache_keys[msg_id]] = response_json
+            rec = box.Box(js_gd.get(msg_id, {}))
+            if 'parsed_job' not in rec or 'scored_job' in rec:
+                continue # gone, or scored another way meanwhile
+            print("Mail:", msg_id)
+            rec.scored_job = response_json
+            apply_score(rec)
+            js_gd[msg_id] = rec.to_dict()
+        if len(results) < len(cache_keys):
+            print(f"Batch {batch_id}: {len(cache_keys) - len(results)} jobs left unscored")
+        del batch_db[batch_id]
+
+def apply_score(rec):
+    """Set rec.score/score_reason from rec.scored_job"""
+    try:
+        scored = json.loads(rec.scored_job)
+        rec.score = int(scored.get('score'))
+        rec.score_reason = scored.get('reason', '')
+        print('score added:', rec.score)
+        print('score reason:', rec.score_reason)
+    except json.JSONDecodeError as e:
+        print("Failed to parse score from JSON response:", e)
+        print("Raw response:", rec.scored_job)
+        traceback.print_exc()
+
+def read_html_part(msg, msg_id, rec, sent_date):
+    """
+    Decoded text/html body of msg (the first one), or None. Text parts are
+    archived under text/ the first time a mail is seen; only the HTML part
+    is decoded after that, from the archived copy once rec.charset is known.
+    """
+    html_content = None
+    sj=rec.subject.replace('/', '')
+    # Hashed once per mail; kept as crc32 of UTF-32 so existing archive
+    # file names still match
+    fn_stem=f'text/{sj} {zlib.crc32(msg_id.encode('utf-32'))}'
+    for part in msg.walk():
+        if part.is_multipart():
+            continue
+        cty=part.get_content_type()
+        print("Content type:", cty)
+        if cty not in ('text/plain', 'text/html'):
+            continue
+        ext='html' if cty=='text/html' else 'txt'
+        if ext=='html' and html_content is not None:
+            continue # only the first HTML part is used
+        fn=f'{fn_stem}.{ext}'
+        if os.path.exists(fn) and (ext=='txt' or 'charset' in rec):
+            if ext=='txt':
+                continue # Later we will do something different maybe
+            with open(fn, 'rb') as fd:
+                payload=fd.read()
+        else:
+            print("Writing:", fn)
+            payload = part.get_payload(decode=True)
+            with open(fn, 'wb') as fd:
+                fd.write(payload)
+            if sent_date and isinstance(sent_date, datetime.datetime):
+                mod_timestamp = sent_date.timestamp()
+                os.utime(fn, (mod_timestamp, mod_timestamp))
+            if ext=='txt':
+                continue
+            rec.charset=part.get_content_charset() or 'utf-8'
+        html_content = payload.decode(rec.charset)
+    return html_content
+
+def save_rec(db, msg_id, rec, stored):
+    """db[msg_id] = rec, skipped when rec still equals stored (what was read)"""
+    data = rec.to_dict()
+    if data != stored:
+        db[msg_id] = data
+
+def process_js_mails(js_emails, batch=False):
     print('process_js_mails')
     print(f'len js_emails {len(js_emails)}')
     gdbm_path = os.path.join(os.path.expanduser(DATABASE_FILENAME))
     js_gd=gdata.gdata(gdbm_path) # I cleanup at the end
     uids_to_delete=set()
+    to_score={} # msg_id -> rec, scored after every email is parsed
+    app_gd=None # applications database, opened on the first application
     for uid, msg in js_emails:
         uid=int(uid) #Assumption here!
         msg_id=msg['Message-ID']
@@ -129,7 +357,8 @@ def process_js_mails(js_emails):
         if not ( msg_id.startswith('<') and msg_id.endswith('>') ):
             print("Warning - Doesn't have angle brackets - added")
             msg_id=f'<{msg_id}>'
-        rec=box.Box(js_gd.get(msg_id, {}))
+        stored=js_gd.get(msg_id, {})
+        rec=box.Box(stored)
 
         if 'Subject' in msg and not 'subject' in rec:
             rec.subject = decode_header_value(msg['Subject'])
@@ -143,7 +372,7 @@ def process_js_mails(js_emails):
                 sent_date=email.utils.parsedate_to_datetime(msg['Date'])
                 rec.date=sent_date.isoformat()
             rec.unclassified = {} # XXX Should possibly be True
-            js_gd[msg_id]=rec.to_dict()
+            save_rec(js_gd, msg_id, rec, stored)
             print("Stored unclassified email")
             continue
         if 'Date' not in msg:
@@ -163,60 +392,38 @@ def process_js_mails(js_emails):
                 del js_gd[msg_id]
             continue
 
-        for part in msg.walk():
-            if part.is_multipart():
-                print("Found multipart")
-                continue
-            cty=part.get_content_type()
-            print("Content type:", cty)
-            if cty not in ['text/plain', 'text/html']:
+        # The body is only needed until the mail has been parsed
+        html_content = None
+        if 'parsed_job' not in rec and 'parsed_application' not in rec:
+            html_content = read_html_part(msg, msg_id, rec, sent_date)
+            if html_content is None:
+                print("No text/html part")
+                save_rec(js_gd, msg_id, rec, stored)
                 continue
+
+        # Handle application confirmations separately
+        if rec.job_type == "application":
+            import js_application_parser
+            if 'parsed_application' not in rec:
+                rec.parsed_application = js_application_parser.parse_jobserve_application_confirmation(html_content)
+                print("Parsed application:", rec.parsed_application)
             
-            ext='html' if cty[cty.index('/')+1:]=='html' else 'txt'
-            sj=str().join(ch for ch in rec.subject if ch not in '/')
-            fn=f'text/{sj} {zlib.crc32(msg_id.encode('utf-32'))}.{ext}'
-            # XXX If the file doesn't already exist or has a different time
-            if not os.path.exists(fn) or 'charset' not in rec:
-                print("Writing:", fn)
-                payload = part.get_payload(decode=True)
-                with open(fn, 'wb') as fd:
-                    fd.write(payload)
-                if sent_date and isinstance(sent_date, datetime.datetime):
-                    mod_timestamp = sent_date.timestamp()
-                    os.utime(fn, (mod_timestamp, mod_timestamp))    
-                if ext=='txt':
-                    continue # Later we will do something different maybe
-                rec.charset=part.get_content_charset() or 'utf-8'
-            else:
-                with open(fn, 'rb') as fd:
-                    payload=fd.read()
-                
-            html_content = payload.decode(rec.charset)
-            
-            # Handle application confirmations separately
-            if rec.job_type == "application":
-                import js_application_parser
-                if 'parsed_application' not in rec:
-                    rec.parsed_application = js_application_parser.parse_jobserve_application_confirmation(html_content)
-                    print("Parsed application:", rec.parsed_application)
-                
-                # Store ONLY in separate applications database, not in main jobs database
-                app_gdbm_path = os.path.expanduser('~/.jobserve_applications.gdbm')
-                app_gd = gdata.gdata(app_gdbm_path)
-                app_gd[msg_id] = dict(rec)
-                app_gd.close()
-                print("Stored application confirmation")
-                continue  # Don't store in main jobs database
-            
-            # Handle job suggestions and alerts
+            # Store ONLY in separate applications database, not in main jobs database
+            if app_gd is None:
+                app_gd = gdata.gdata(os.path.expanduser(APPLICATIONS_DATABASE_FILENAME))
+            app_gd[msg_id] = dict(rec)
+            print("Stored application confirmation")
+            continue  # Don't store in main jobs database
+        
+        # Handle job suggestions and alerts
+        elif 'parsed_job' not in rec and rec.job_type not in ("suggestion", "alert"):
+            print("Job type not suggestion nor alert but",rec.job_type)
+        else:
             if 'parsed_job' not in rec:
                 if rec.job_type =="suggestion":
                     rec.parsed_job = js_email.parse_jobserve_email_part(html_content)
-                elif rec.job_type =="alert":
-                    rec.parsed_job = js_alert_parser.parse_jobserve_alert(html_content)
                 else:
-                    print("Job type not suggestion nor alert but",rec.job_type)
-                    continue
+                    rec.parsed_job = js_alert_parser.parse_jobserve_alert(html_content)
                 print("Parsed:", rec.parsed_job)
                 if 'job_url' not in rec.parsed_job:
                     print("rec.parsed_job", rec.job_type, "is missing job_url")
@@ -237,84 +444,77 @@ def process_js_mails(js_emails):
                         "score": 0,
                         "reason": skip_reason
                     })
-                    js_gd[msg_id] = rec.to_dict()
-                    continue  # Skip to next email
-                
-                # If we get here, proceed with LLM analysis
-                if 'cv' not in vars():
-                    cv_file = os.path.expanduser(CV_PATH)
-                    with open(cv_file, 'r') as fd:
-                        cv = fd.read()
-                if 'client' not in vars():
-                    with open(os.path.expanduser(KEY_PATH + ".yaml"), "r") as fd:
-                        client_params = yaml.safe_load(fd.read())
-                    client = openai.OpenAI(**client_params)
-
-                # Define the schema for the LLM output
-                schema_instruction = (
-                    "Analyze how well this CV matches the job description. "
-                    "Respond in JSON with two fields: 'score' (integer 0-10, be discriminating) and 'reason' (string). "
-                    "In 'reason', provide a detailed explanation (at least 120-200 words) including: "
-                    "key skill matches, experience gaps, seniority fit, domain relevance, and any blockers (e.g., location, clearance). "
-                    "Use clear sentences (no bullet lists) to keep it readable. "
-                    "Example: {\"score\": 7, \"reason\": \"Strong Python and data experience, but limited MLOps...\"} "
-                )
-                chat_completion = client.chat.completions.create(
-                    messages=[
-                        {"role": "system", "content": SYSTEM_CONTENT},
-                        {"role": "user", "content": '\n'.join((
-                            schema_instruction,
-                            "Job Details:", rec.parsed_job['description'],
-                            "CV:", cv
-                        ))}
-                    ],
-                    model=MODEL,
-                    temperature=0.3,
-                    response_format={"type": "json_object"},
-                    max_tokens=600
-                )
-                response_json = chat_completion.choices[0].message.content
-                print(f"Response (JSON):", response_json)
-                rec.scored_job = response_json
-
-            if 'score' not in rec:
-                try:
-                    scored = json.loads(rec.scored_job)
-                    rec.score = int(scored.get('score'))
-                    rec.score_reason = scored.get('reason', '')
-                    print('score added:', rec.score)
-                    print('score reason:', rec.score_reason)
-                except json.JSONDecodeError as e:
-                    import traceback
-                    print("Failed to parse score from JSON response:", e)
-                    print("Raw response:", rec.scored_job)
-                    traceback.print_exc()
+                else:
+                    # If we get here, queue it for LLM analysis
+                    to_score[msg_id] = rec
+            elif 'score' not in rec:
+                apply_score(rec)
             else:
                 print('score found:', rec.score)
-        js_gd[msg_id]=rec.to_dict()
+        save_rec(js_gd, msg_id, rec, stored)
         print("/\\"*20)
+    # Release the applications database (read by the reports) before
+    # scoring; js_gd stays open, as scores are written back to it
+    if app_gd is not None:
+        app_gd.close()
+
+    batch_db = gdata.gdata(os.path.expanduser(BATCH_STATE_FILENAME))
+    llm_cache = gdata.gdata(os.path.expanduser(LLM_CACHE_FILENAME))
+    collect_batches(batch_db, llm_cache, js_gd)
+    if to_score:
+        cv = load_cv()
+        requests = {msg_id: build_request(rec.parsed_job, cv) for msg_id, rec in to_score.items()}
+        cache_keys = {msg_id: request_key(request) for msg_id, request in requests.items()}
+        cached = {}
+        uncached = {}
+        for msg_id, request in requests.items():
+            response_json = llm_cache.get(cache_keys[msg_id])
+            if response_json is None:
+                uncached[msg_id] = request
+            else:
+                cached[msg_id] = response_json
+        print(f"Scoring {len(requests)} jobs: {len(cached)} cached, {len(uncached)} to send")
+
+        scored = cached.items()
+        if uncached and batch:
+            # Applied by collect_batches on a later run; skip jobs already submitted
+            pending = {key for _, keys in batch_db.items() for key in keys.values()}
+            uncached = {msg_id: request for msg_id, request in uncached.items()
+                        if cache_keys[msg_id] not in pending}
+            if uncached:
+                batch_id = submit_batch(openai_client(), uncached)
+                batch_db[batch_id] = {msg_id: cache_keys[msg_id] for msg_id in uncached}
+        elif uncached:
+            scored = itertools.chain(scored, score_jobs_sync(openai_client(), uncached))
+
+        for msg_id, response_json in scored:
+            rec = to_score[msg_id]
+            print("Mail:", msg_id)
+            print(f"Response (JSON):", response_json)
+            if msg_id in uncached:
+                llm_cache[cache_keys[msg_id]] = response_json
+            rec.scored_job = response_json
+            apply_score(rec)
+            js_gd[msg_id]=rec.to_dict()
+    llm_cache.close()
+    batch_db.close()
     return uids_to_delete
 
             
 
-#def main(js_emails, dbfile='~/.email3.mail.gdbm', verbose=True):
-#    with gdata.gdata(os.path.expanduser(dbfile), mode='r') as emaildb:
-#        if not js_emails:
-#            js_emails=emaildb.keys()
-#        iemails=[(k, email.message_from_bytes(emaildb[k])) for k in js_emails]
-#        return process_js_mails(iemails)
-#
-#if __name__=="__main__":
-#    p = argparse.ArgumentParser(description="Parse a jobserve email and AI it" )
-#    p.add_argument("ids", help=f"Message-IDs")
-#    p.add_argument("--dbfile", help=f"Path to gdbm file (default {DATABASE_FILENAME})")
-#    p.add_argument("--verbose", action="store_true", help="More verbose debugging")
-#    p.add_argument("--no-verbose", dest="verbose", action="store_false", help="Disable verbose")
-#
-#    #p.add_argument("--reprocess", action="store_true", help="Reprocess mails already seen")
-#    #p.add_argument("--no-reprocess", dest="reprocess", action="store_false", help="Disable reprocess")
-#    p.set_defaults(show=None, reprocess=None)
-#    ns=p.parse_args()
-#    args=ns.args
-#    kwargs = {k: v for k, v in vars(ns).items() if v is not None and v!='ids'}
-#    print(main(*args, **kwargs))
+def main(js_emails, dbfile='~/.email3.mail.gdbm', batch=False):
+    with gdata.gdata(os.path.expanduser(dbfile), mode='r') as emaildb:
+        if not js_emails:
+            js_emails=emaildb.keys()
+        iemails=[(k, email.message_from_bytes(emaildb[k])) for k in js_emails]
+    return process_js_mails(iemails, batch=batch)
+
+if __name__=="__main__":
+    p = argparse.ArgumentParser(description="Parse jobserve emails and AI them" )
+    p.add_argument("ids", nargs="*", help="Mail database keys (default: every mail)")
+    p.add_argument("--dbfile", help="Path to the mail gdbm file (default ~/.email3.mail.gdbm)")
+    p.add_argument("--batch", action="store_true",
+                   help="Score through the OpenAI Batch API; results are applied on a later run")
+    ns=p.parse_args()
+    kwargs = {k: v for k, v in vars(ns).items() if v is not None and k!='ids'}
+    print(main(ns.ids, **kwargs))
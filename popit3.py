@@ -43,6 +43,10 @@ DEFAULT_AUTHORITY = "https://login.microsoftonline.com/consumers"
 POP_SCOPE = "https://outlook.office.com/POP.AccessAsUser.All"
 # Handle dbfile defaults
 DEFAULT_DBFILE = "~/.email3.mail.gdbm"
+RETR_BATCH = 10  # RETR commands sent per round trip when PIPELINING is offered
+TOKEN_MARGIN = 60  # seconds; refresh a token this long before it expires
+
+_tokens = {}  # machine -> (access_token, expires_at), for repeated main() calls
     
 
 
@@ -62,7 +66,7 @@ class Pop3TLS:
         raw = socket.create_connection((self.host, self.port), timeout=self.timeout)
         ctx = ssl.create_default_context()
         self.sock = ctx.wrap_socket(raw, server_hostname=self.host)
-        self.file = self.sock.makefile("rb", buffering=0)
+        self.file = self.sock.makefile("rb", buffering=65536)
         banner = self._readline()
         print(banner.decode("utf-8", "replace").rstrip())
         return self
@@ -81,15 +85,15 @@ class Pop3TLS:
         self.sock.sendall(line.encode("utf-8"))
 
     def _readline(self):
-        buf = bytearray()
-        while True:
-            b = self.file.read(1)
-            if not b:
+        # readline() stops at any LF; keep going until the CRLF that ends
+        # the POP3 line, so a bare LF in a message stays inside its line
+        line = self.file.readline()
+        while line and not line.endswith(b"\r\n"):
+            more = self.file.readline()
+            if not more:
                 break
-            buf += b
-            if len(buf) >= 2 and buf[-2:] == b"\r\n":
-                break
-        return bytes(buf)
+            line += more
+        return line
 
     def _read_multiline(self):
         lines = []
@@ -102,6 +106,20 @@ class Pop3TLS:
             lines.append(line)
         return lines
 
+    def _read_multiline_into(self, buf):
+        """Append a dot-terminated reply to buf (a bytearray), unstuffed, CRLFs kept."""
+        # Line at a time from the buffered reader: reading past ".\r\n"
+        # would swallow the next pipelined reply
+        while True:
+            line = self._readline()
+            if line == b".\r\n":
+                break
+            if not line:
+                # A partial message must not be stored as if complete
+                raise ConnectionError("Connection closed before end of multiline reply")
+            buf += line[1:] if line.startswith(b"..") else line  # dot-stuffing unescape
+        return buf
+
     def send_cmd(self, cmd, show=None):
         if show is None:
             show = self.show
@@ -159,6 +177,28 @@ def acquire_access_token_via_refresh(client_id, refresh_token, authority, scope)
     return r.text,js["access_token"]
 
 
+def get_access_token(machine, client_id, refresh_token, authority, scope=POP_SCOPE):
+    """Access token for machine: from memory, else ~/.<machine>_token, else refreshed."""
+    token, expires_at = _tokens.get(machine, (None, 0))
+    if time.time() < expires_at - TOKEN_MARGIN:
+        return token
+
+    access_token_file=os.path.expanduser(f'~/.{machine}_token')
+    if os.path.isfile(access_token_file):
+        with open(access_token_file, "r") as token_fd:
+            token_data=json.load(token_fd)
+        expires_at = os.stat(access_token_file)[stat.ST_MTIME] + token_data['expires_in']
+        token = token_data["access_token"]
+    # Mint an access token via refresh token
+    if time.time() >= expires_at - TOKEN_MARGIN:
+        r_text,token = acquire_access_token_via_refresh(client_id, refresh_token, authority, scope)
+        expires_at = time.time() + json.loads(r_text)['expires_in']
+        with open(access_token_file, "w") as token_fd:
+            token_fd.write(r_text)
+    _tokens[machine] = (token, expires_at)
+    return token
+
+
 def auth_xoauth2(pop, user, access_token):
     resp = pop.send_cmd("AUTH XOAUTH2")
     if not resp.startswith(b"+"):
@@ -170,6 +210,15 @@ def auth_xoauth2(pop, user, access_token):
     pop.expect_ok(resp, "XOAUTH2")
 
 
+def get_capabilities(pop):
+    """Return the set of CAPA names (upper-cased); empty if CAPA is refused."""
+    resp = pop.send_cmd("CAPA")
+    if not resp.startswith(b"+OK"):
+        return set()
+    return {ln.split()[0].decode("ascii", "replace").upper()
+            for ln in pop._read_multiline() if ln.strip()}
+
+
 def get_uidl_map(pop):
     """Return {uidl: (msgnum, uidl)} -- using UIDL for stable IDs."""
     resp = pop.send_cmd("UIDL")
@@ -190,8 +239,23 @@ def fetch_message_bytes(pop, msgnum):
     """RETR msgnum and return raw bytes (without the final dot line)."""
     resp = pop.send_cmd(f"RETR {msgnum}")
     pop.expect_ok(resp, "RETR")
-    lines = pop._read_multiline()
-    return b"".join(lines)  # each line already has CRLF
+    return bytes(pop._read_multiline_into(bytearray()))
+
+def fetch_message_bytes_batch(pop, msgnums, batch=RETR_BATCH):
+    """RETR each of msgnums, pipelined (RFC 2449); yield (msgnum, raw bytes) as each arrives."""
+    for i in range(0, len(msgnums), batch):
+        chunk = msgnums[i:i + batch]
+        cmds = [f"RETR {num}" for num in chunk]
+        if pop.show:
+            for cmd in cmds:
+                print(f">>> {cmd}")
+        pop._sendline("\r\n".join(cmds))
+        # Replies come back in command order
+        for num in chunk:
+            resp = pop._readline()
+            print(resp.decode("utf-8", "replace").rstrip())
+            pop.expect_ok(resp, "RETR")
+            yield num, bytes(pop._read_multiline_into(bytearray()))
 
 def del_message(pop, msgnum):
     """DELE msgnum."""
@@ -224,18 +288,7 @@ def main(
             raise RuntimeError("client_id not provided. Pass --client-id or set account 'MSAL:<client_id>' in ~/.netrc")
         refresh_token = secret
 
-        access_token_file=os.path.expanduser(f'~/.{machine}_token')
-        token=None
-        if os.path.isfile(access_token_file):
-            with open(access_token_file, "r") as token_fd:
-                token_data=json.load(token_fd)
-            if time.time() - os.stat(access_token_file)[stat.ST_MTIME]<token_data['expires_in']:
-                token=token_data["access_token"]
-        # Mint an access token via refresh token
-        if token is None:
-            r_text,token = acquire_access_token_via_refresh(client_id, refresh_token, authority, POP_SCOPE)
-            with open(access_token_file, "w") as token_fd:
-                token_fd.write(r_text)
+        token = get_access_token(machine, client_id, refresh_token, authority)
 
         with gdata.gdata_raw(gdbm_file=dbfile) as maildb, Pop3TLS(host=host, port=port, show=show) as pop:
             auth_xoauth2(pop, user, token)
@@ -244,17 +297,25 @@ def main(
             uidl_map = get_uidl_map(pop)           # {uidl: num}
 
             # Fetch new mail
+            new_uidls = {num: uidl for uidl, num in uidl_map.items() if uidl not in maildb}
+            if new_uidls and "PIPELINING" in get_capabilities(pop):
+                fetched = fetch_message_bytes_batch(pop, list(new_uidls))
+            else:
+                fetched = ((num, fetch_message_bytes(pop, num)) for num in new_uidls)
+            new_mail = {}
+            for num, raw in fetched:
+                # Stored as each one arrives, so an error later in the run
+                # does not lose the messages already downloaded
+                maildb[new_uidls[num]] = raw  # store raw bytes
+                new_mail[new_uidls[num]] = raw
             mails_to_process = []
             for uidl, num in uidl_map.items():
-                if uidl in maildb:
-                    if reprocess:
-                        raw=maildb[uidl]
-                    else:
-                        continue
+                if uidl in new_mail:
+                    raw = new_mail[uidl]
+                elif reprocess:
+                    raw=maildb[uidl]
                 else:
-                    raw = fetch_message_bytes(pop, num)  # bytes
-
-                    maildb[uidl] = raw  # store raw bytes
+                    continue
                 mails_to_process.append((uidl, raw))
             # Call processing function for new emails
             todelete=process_emails.do_processing(mails_to_process, maildb)
@@ -3,6 +3,7 @@ if __name__ != "__main__": print("Module:", __name__)
 import os
 import gdata
 import email
+import email.parser
 import scanmailheaders
 
 import MyDavidLloydSchedule
@@ -90,32 +91,42 @@ def do_processing(new_emails, mail_db=None, meta_db_file = os.path.expanduser("~
     print("Processing new emails:")
     print(*(x[0].decode('utf-8') for x in new_emails), sep=',')
     
+    # Routing only needs the headers; bodies are parsed below, and only
+    # for mails that a handler in map will actually receive
+    header_parser=email.parser.BytesHeaderParser()
     with gdata.gdata(gdbm_file=meta_db_file, mode=mode) as metadb:
         for uidl, email_bin in new_emails:
-            msg=email.message_from_bytes(_norm(email_bin))
-            To=msg['To']
+            raw=_norm(email_bin)
+            headers=header_parser.parsebytes(raw)
+            To=headers['To']
             try:
                 parsed_to = scanmailheaders.parse_email_addresses(To)
             except TypeError as e:
-                frm = msg.get('From')
-                subj = msg.get('Subject')
-                dt = msg.get('Date')
-                mid = msg.get('Message-ID')
+                frm = headers.get('From')
+                subj = headers.get('Subject')
+                dt = headers.get('Date')
+                mid = headers.get('Message-ID')
                 print(
                     f"ERROR parsing To header (uidl={uidl!r}): {e}; "
                     f"To={To!r} From={frm!r} Subject={subj!r} Date={dt!r} Message-ID={mid!r}"
                 )
-                foo.setdefault(None, []).append((uidl, msg))
+                foo.setdefault(None, []).append((uidl, raw))
                 continue
             #print('To:', To)
             to_addresses=[ address for address, safe in parsed_to if bool(safe)]
             for addr in to_addresses:
-                foo.setdefault(addr, []).append((uidl,msg))
+                foo.setdefault(addr, []).append((uidl,raw))
     print(json.dumps(sorted([(to, len(refs)) for to, refs in foo.items()], key=lambda x:x[1])))
+    parsed={} # uidl -> Message, for mails routed to more than one handler
     for email_match, mail_func in map:
         print(f"Processing {email_match}:")
         try:
-            dels=mail_func(foo.get(email_match, []))
+            mails=[]
+            for uidl, raw in foo.get(email_match, []):
+                if uidl not in parsed:
+                    parsed[uidl]=email.message_from_bytes(raw)
+                mails.append((uidl, parsed[uidl]))
+            dels=mail_func(mails)
             print('Dels:', dels)
             deletes.update(dels) # still call even if new IDs, for old mail expiration etc
         except Exception as e:
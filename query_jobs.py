@@ -24,17 +24,16 @@ def get_all_jobs():
     """
     results = []
     with get_database() as db:
-        for key in db.keys():
+        for key, email_data in db.items():
             # Skip metadata keys
             if key.startswith('M:') or (key.isdigit() and len(key) == 8):
                 continue
             
             try:
-                email_data = db[key]
                 # Only return entries that have job data
                 if 'parsed_job' in email_data:
                     results.append((key, email_data))
-            except (KeyError, TypeError):
+            except TypeError:
                 continue
     
     return results
@@ -46,16 +45,15 @@ def get_jobs_by_jobserve_ref(jobserve_ref):
     """
     results = []
     with get_database() as db:
-        for key in db.keys():
+        for key, email_data in db.items():
             # Skip metadata keys
             if key.startswith('M:') or (key.isdigit() and len(key) == 8):
                 continue
             
             try:
-                email_data = db[key]
                 if email_data.get('jobserve_ref') == jobserve_ref:
                     results.append((key, email_data))
-            except (KeyError, TypeError):
+            except TypeError:
                 continue
     
     return results
@@ -101,17 +99,16 @@ def get_jobs_needing_llm_processing():
     """
     results = []
     with get_database() as db:
-        for key in db.keys():
+        for key, email_data in db.items():
             # Skip metadata keys
             if key.startswith('M:') or (key.isdigit() and len(key) == 8):
                 continue
             
             try:
-                email_data = db[key]
                 # Only return entries that have job data but no LLM results
                 if 'parsed_job' in email_data and 'llm_results' not in email_data:
                     results.append((key, email_data))
-            except (KeyError, TypeError):
+            except TypeError:
                 continue
     
     return results
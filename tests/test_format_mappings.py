@@ -153,3 +153,22 @@ def test_format_output_empty_csv():
     out, mime = job_api.format_output([], 'text/csv')
     # Empty CSV should have a minimal status line
     assert 'status' in out.lower() or 'ok' in out.lower()
+
+
+# ---------------------------------------------------------------------------
+# Environment config
+# ---------------------------------------------------------------------------
+
+
+def test_get_config_from_env_tracks_environment(monkeypatch):
+    monkeypatch.setenv('JOBSERVE_DAYS', '3')
+    assert job_api.get_config_from_env()['days'] == 3
+    monkeypatch.setenv('JOBSERVE_DAYS', '4')
+    assert job_api.get_config_from_env()['days'] == 4
+
+
+def test_get_config_from_env_returns_independent_dicts(monkeypatch):
+    monkeypatch.setenv('JOBSERVE_MIN_SCORE', '5')
+    config = job_api.get_config_from_env()
+    config['min_score'] = 99
+    assert job_api.get_config_from_env()['min_score'] == 5
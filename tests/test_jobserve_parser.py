@@ -0,0 +1,63 @@
+import datetime
+import email
+
+import pytest
+
+import jobserve_parser
+
+
+JSLINKA = "https://www.jobserve.com/jslinka.aspx?a=1"
+
+
+@pytest.mark.parametrize("html_content, expected", [
+    (f'<a href="{JSLINKA}">Apply</a>', JSLINKA),
+    (f"<p>{JSLINKA} Apply now</p>", JSLINKA),
+    # A non-breaking space ends the link just like a plain one
+    (f"<p>{JSLINKA}\xa0Apply now</p>", JSLINKA),
+    ("<p>no link here</p>", None),
+])
+def test_extract_job_url(html_content, expected):
+    assert jobserve_parser.extract_job_url_from_html(html_content) == expected
+
+
+@pytest.mark.parametrize("charset", ["utf-8", "iso-8859-1"])
+def test_extract_job_url_bytes_stops_at_nbsp(charset):
+    payload = f"<p>{JSLINKA}\xa0Apply now</p>".encode(charset)
+    assert jobserve_parser.extract_job_url_from_html_bytes(payload, charset) == JSLINKA
+
+
+def test_extract_headers_decodes_into_plain_dict():
+    msg = email.message_from_string(
+        "Subject: =?utf-8?q?caf=C3=A9_role?=\n"
+        "To: a@example.com\n"
+        "X-Mailer: skipped\n"
+        "Date: Thu, 02 Jan 2025 10:00:00 +0000\n\n"
+    )
+    headers = jobserve_parser.extract_headers(msg)
+    assert type(headers) is dict
+    assert headers["Subject"] == "café role"
+    assert "X-Mailer" not in headers
+    assert headers["Date"] == datetime.datetime(2025, 1, 2, 10, tzinfo=datetime.timezone.utc)
+
+
+def test_email_record_to_db_layout():
+    headers = {"Subject": "s"}
+    parsed = {"job_title": "t"}
+    data = jobserve_parser.EmailRecord(headers=headers, uidl=7, job_type="alert", parsed=parsed).to_db()
+    assert data == {"headers": headers, "jobserve_ref": None, "job_type": "alert",
+                    "parsed": parsed, "UIDL": 7}
+    # Stored as-is, not copied
+    assert data["headers"] is headers and data["parsed"] is parsed
+    assert jobserve_parser.EmailRecord.from_db(data).to_db() == data
+
+
+def test_find_html_file_with_and_without_brackets(tmp_path):
+    (tmp_path / "Job alert.<abc@mail.example>.12.html").write_text("")
+    (tmp_path / "Old alert.def@mail.example.13.html").write_text("")
+    (tmp_path / "notes.txt").write_text("")
+    html_index = jobserve_parser.build_html_index(str(tmp_path))
+    assert jobserve_parser.find_html_file(html_index, "abc@mail.example") == \
+        str(tmp_path / "Job alert.<abc@mail.example>.12.html")
+    assert jobserve_parser.find_html_file(html_index, "def@mail.example") == \
+        str(tmp_path / "Old alert.def@mail.example.13.html")
+    assert jobserve_parser.find_html_file(html_index, "missing@mail.example") is None
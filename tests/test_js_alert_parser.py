@@ -0,0 +1,58 @@
+import pytest
+
+import js_alert_parser
+
+
+ALERT = """<html><body><table><tr><td><a class="heading" href="https://www.jobserve.com/jslinka.aspx?b=2">Data\tEngineer &amp; ML</a></td></tr>
+<tr><td><h2 style="font-size: 18px">Leeds</h2><h2 style="font-size: 18px">&pound;500/day</h2><h2 style="font-size: 18px"> </h2><h2 style="font-size: 18px">Permanent</h2><h2>ignored</h2></td></tr>
+<tr><td style="padding-top: 7px; padding-bottom: 20px"><p>Build <b>pipelines</b></p><p>with   Spark<br>and Kafka &#x2013; now</p></td></tr>
+<tr><td style="padding-top: 10px; padding-bottom: 8px">Employment Agency: Foo &amp; Co<br>Ref: R99<br>Posted: 03/04/2025<br>mailto:x@y.z<br>a@b.c<br>Other: thing</td></tr>
+</table></body></html>"""
+
+# The description cell holds a table; capture stops at the first </td>
+NESTED_TD = """<html><body><table><tr><td><a class="heading" href="https://www.jobserve.com/jslinka.aspx?c=3">Nested</a></td></tr>
+<tr><td style="padding-top: 7px; padding-bottom: 20px">Intro<br>text<table><tr><td>inner cell</td><td>second cell</td></tr></table>after the table</td></tr>
+<tr><td style="padding-top: 10px; padding-bottom: 8px">Ref: N1</td></tr>
+</table></body></html>"""
+
+
+@pytest.fixture(params=["html.parser", "lxml"])
+def parse_alert(request, monkeypatch):
+    """parse_jobserve_alert forced onto one of its two parsing paths"""
+    if request.param == "lxml":
+        pytest.importorskip("lxml.html")
+    else:
+        monkeypatch.setattr(js_alert_parser, "lxml", None)
+    return js_alert_parser.parse_jobserve_alert
+
+
+def test_alert_fields(parse_alert):
+    result = parse_alert(ALERT)
+    assert result == {
+        "job_title": "Data Engineer & ML",
+        "job_url": "https://www.jobserve.com/jslinka.aspx?b=2",
+        "location": "Leeds",
+        "salary": "£500/day",
+        "work_type": "Permanent",
+        "description": (
+            "Build pipelineswith Spark and Kafka – now\n"
+            "Employment Business: Foo & Co\nRef: R99\nPosted: 03/04/2025"
+        ),
+        "employment_business": "Foo & Co",
+        "ref": "R99",
+        "posted": "03/04/2025",
+    }
+
+
+def test_nested_td_description_stops_at_first_close(parse_alert):
+    result = parse_alert(NESTED_TD)
+    assert result["description"] == "Intro textinner cell\nRef: N1"
+    assert result["ref"] == "N1"
+
+
+@pytest.mark.parametrize("html_content", [ALERT, NESTED_TD, "", "<p>no alert here</p>"])
+def test_lxml_and_html_parser_agree(html_content, monkeypatch):
+    pytest.importorskip("lxml.html")
+    with_lxml = js_alert_parser.parse_jobserve_alert(html_content)
+    monkeypatch.setattr(js_alert_parser, "lxml", None)
+    assert js_alert_parser.parse_jobserve_alert(html_content) == with_lxml
@@ -0,0 +1,49 @@
+import js_application_parser
+
+
+# Layout of a JobServe "Application Confirmation" email body
+CONFIRMATION = """<html><body>
+<table width="100%" cellpadding="0" cellspacing="0">
+<tr><td style="padding: 10px">Dear John,<br>Thank you, you have applied for the job listed below.</td></tr>
+<tr><td style="font-size: 18px"><b>Rust Developer</b></td></tr>
+<tr><td>Manchester</td></tr>
+<tr><td>Contract</td></tr>
+<tr><td>A long description of the role, with many words about <i>async</i> Rust services.</td></tr>
+<tr><td>Reference:</td><td>ABC/123</td></tr>
+<tr><td>Posted By:</td><td>Agency X</td></tr>
+<tr><td>Contact:</td><td>Jane  Doe</td></tr>
+<tr><td>Telephone:</td><td>0117 496 0000</td></tr>
+<tr><td>Email:</td><td>jane@example.com</td></tr>
+</table></body></html>"""
+
+
+def test_confirmation_fields():
+    result = js_application_parser.parse_jobserve_application_confirmation(CONFIRMATION)
+    assert result == {
+        "job_title": "Rust Developer",
+        "location": "Manchester",
+        "work_type": "Contract",
+        "description": "A long description of the role, with many words about async Rust services.",
+        "reference": "ABC/123",
+        "posted_by": "Agency X",
+        "contact_name": "Jane Doe",
+        "contact_email": "jane@example.com",
+        "contact_phone": "0117 496 0000",
+    }
+
+
+def test_nested_table_cell_restarts_at_inner_td():
+    html_part = CONFIRMATION.replace(
+        "<tr><td>Manchester</td></tr>",
+        "<tr><td>Outer<table><tr><td>Manchester</td></tr></table>tail</td></tr>",
+    )
+    result = js_application_parser.parse_jobserve_application_confirmation(html_part)
+    # The inner <td> starts a new cell; the outer cell's text is not kept
+    assert result["location"] == "Manchester"
+    assert result["work_type"] == "Contract"
+
+
+def test_entity_references_are_dropped():
+    html_part = CONFIRMATION.replace("Agency X", "Foo &amp; Bar &#163;5")
+    result = js_application_parser.parse_jobserve_application_confirmation(html_part)
+    assert result["posted_by"] == "Foo Bar 5"
@@ -35,3 +35,25 @@ def test_wsgi_jobs_csv_ok(wsgi_server):
     lines = [ln for ln in body.splitlines() if ln.strip()]
     assert lines[0].startswith("score,reference,job_title,")
     assert len(lines) >= 1
+
+
+def test_wsgi_content_length_counts_bytes(monkeypatch):
+    """Content-Length must be the UTF-8 byte count, not the character count."""
+    import job_api
+
+    def fake_payload(*args, **kwargs):
+        return json.dumps({"salary": "£500/day"}, ensure_ascii=False), "application/json; charset=utf-8"
+
+    monkeypatch.setattr(job_api, "build_success_payload", fake_payload)
+
+    captured = {}
+
+    def start_response(status, headers):
+        captured["status"] = status
+        captured["headers"] = dict(headers)
+
+    body = b"".join(job_api.application({"HTTP_ACCEPT": "application/json"}, start_response))
+
+    assert captured["status"] == "200 OK"
+    assert captured["headers"]["Content-Length"] == str(len(body))
+    assert json.loads(body.decode("utf-8"))["salary"] == "£500/day"
@@ -1,11 +1,20 @@
 #!/usr/bin/env python3
-from wsgiref.simple_server import make_server
+from socketserver import ThreadingMixIn
+from wsgiref.simple_server import WSGIServer, make_server
 
 from job_api import application
 
 
+class ThreadingWSGIServer(ThreadingMixIn, WSGIServer):
+    """WSGIServer that handles each request on its own thread."""
+
+    # Don't wait for in-flight requests on shutdown
+    daemon_threads = True
+
+
 def main(host: str = "127.0.0.1", port: int = 8051) -> None:
-    with make_server(host, port, application) as httpd:
+    with make_server(host, port, application,
+                     server_class=ThreadingWSGIServer) as httpd:
         print(f"Serving WSGI job_api on http://{host}:{port} ...")
         try:
             httpd.serve_forever()